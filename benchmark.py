@@ -0,0 +1,637 @@
+# benchmark.py
+# Benchmark beban offline: menjalankan handler asli bot dengan pengguna sintetis tanpa menghubungi Telegram,
+# MongoDB, OpenAI, Gemini, BotAcax maupun YouTube. Semua backend diganti stub lokal dengan latency yang bisa diatur.
+#
+# Contoh:
+#   python benchmark.py --users 20 --requests 5
+#   python benchmark.py --scenario song vsong --users 50 --hit-ratio 0.5 --output benchmark_results.jsonl
+#   python benchmark.py --baseline benchmark_results.jsonl --max-regression 0.2   (exit code 1 jika lebih lambat)
+
+import os
+import json
+import time
+import random
+import argparse
+import asyncio
+import logging
+import resource
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+import config
+
+logger = logging.getLogger("benchmark")
+
+# Skenario -> (modul fitur, handler, perintah)
+SCENARIOS = {
+    "start": ("users", "start_command", "start"),
+    "ask_openai": ("ai", "ask_openai_command", "ask_openai"),
+    "ask_gemini": ("ai", "ask_gemini_command", "ask_gemini"),
+    "tiktok": ("tiktok", "tiktok_download", "tiktok_dl"),
+    "song": ("media", "youtube_song_download", "song"),
+    "vsong": ("media", "youtube_video_download", "vsong"),
+}
+
+STUB_ANSWER = (
+    "Ini adalah jawaban sintetis dari stub lokal benchmark. Panjangnya dibuat mirip jawaban AI biasa "
+    "agar biaya streaming, edit pesan dan cache ikut terukur. "
+) * 6
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark beban offline untuk handler bot")
+    parser.add_argument("--scenario", nargs="+", choices=(*SCENARIOS, "all"), default=["all"])
+    parser.add_argument("--users", type=int, default=20, help="Jumlah pengguna sintetis yang berjalan bersamaan")
+    parser.add_argument("--requests", type=int, default=5, help="Permintaan berurutan per pengguna")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Jeda (detik) antar permintaan satu pengguna")
+    parser.add_argument("--hit-ratio", type=float, default=0.0, help="Porsi permintaan yang memakai query/prompt/video yang sama (uji cache)")
+    parser.add_argument("--privileged", action="store_true", help="Pengguna sintetis dianggap owner (tidak terkena token bucket)")
+    parser.add_argument("--ai-latency", type=float, default=0.8, help="Latency stub OpenAI/Gemini (detik)")
+    parser.add_argument("--botacax-latency", type=float, default=0.3, help="Latency stub BotAcax (detik)")
+    parser.add_argument("--mongo-latency", type=float, default=0.002, help="Latency MongoDB di memori (detik)")
+    parser.add_argument("--telegram-latency", type=float, default=0.05, help="Latency API Telegram palsu per panggilan (detik)")
+    parser.add_argument("--upload-mbps", type=float, default=50.0, help="Kecepatan upload Telegram palsu (Mbit/s)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Variasi acak latency stub (0.2 = +/-20%%)")
+    parser.add_argument("--media-dir", help="Folder berisi song.mp3 dan video.mp4 asli; default file sintetis dibuat otomatis")
+    parser.add_argument("--audio-size", type=int, default=4 * 1024 * 1024, help="Ukuran file audio sintetis (byte)")
+    parser.add_argument("--video-size", type=int, default=12 * 1024 * 1024, help="Ukuran file video sintetis (byte)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Ukur puncak alokasi Python (lebih lambat)")
+    parser.add_argument("--output", help="Tambahkan hasil (JSON Lines) ke file ini")
+    parser.add_argument("--baseline", help="File JSON Lines hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Batas penurunan throughput / kenaikan p99 terhadap baseline")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan log bot")
+    args = parser.parse_args()
+    if "all" in args.scenario:
+        args.scenario = list(SCENARIOS)
+    return args
+
+# --- Stub backend ---
+
+def jittered(seconds, jitter):
+    return max(0.0, seconds * random.uniform(1 - jitter, 1 + jitter))
+
+def prepare_media(args, workdir):
+    """Menyiapkan song.mp3 dan video.mp4 yang disajikan stub HTTP sebagai pengganti YouTube."""
+    if args.media_dir:
+        return args.media_dir
+    media_dir = os.path.join(workdir, "media")
+    os.makedirs(media_dir, exist_ok=True)
+    frame = b"\xff\xfb\x90\x64" + bytes(413) # Frame MP3 kosong 128 kbps; isinya tidak perlu bisa diputar
+    with open(os.path.join(media_dir, "song.mp3"), "wb") as f:
+        f.write(frame * (args.audio_size // len(frame) + 1))
+    with open(os.path.join(media_dir, "video.mp4"), "wb") as f:
+        f.write(os.urandom(args.video_size))
+    return media_dir
+
+async def start_http_stub(args, media_dir):
+    """Satu server aiohttp lokal untuk OpenAI (chat completions), BotAcax dan file media."""
+    from aiohttp import web
+
+    async def openai_chat(request):
+        body = await request.json()
+        await asyncio.sleep(jittered(args.ai_latency, args.jitter))
+        if not body.get("stream"):
+            return web.json_response({
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": STUB_ANSWER}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 100, "total_tokens": 110},
+            })
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for start in range(0, len(STUB_ANSWER), 40):
+            chunk = {
+                "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get("model"),
+                "choices": [{"index": 0, "delta": {"content": STUB_ANSWER[start:start + 40]}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(0.02)
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def botacax_tiktok(request):
+        body = await request.json()
+        await asyncio.sleep(jittered(args.botacax_latency, args.jitter))
+        video_id = body["url"].rstrip("/").rsplit("/", 1)[-1]
+        return web.json_response({
+            "status": "success",
+            "data": {"video_url_no_watermark": f"http://{request.host}/media/tiktok-{video_id}.mp4"},
+        })
+
+    async def botacax_userinfo(request):
+        await asyncio.sleep(jittered(args.botacax_latency, args.jitter))
+        return web.json_response({"status": "success", "data": {"telegram_id": request.query.get("telegram_id")}})
+
+    async def media_file(request):
+        # song-<n>.mp3 / video-<n>.mp4 -> song.mp3 / video.mp4: nama unik agar yt-dlp menganggapnya video berbeda
+        name = request.match_info["name"]
+        stem, ext = os.path.splitext(name)
+        base = "video" if ext == ".mp4" else stem.split("-", 1)[0]
+        return web.FileResponse(os.path.join(media_dir, base + ext))
+
+    app = web.Application()
+    app.router.add_post("/openai/v1/chat/completions", openai_chat)
+    app.router.add_post("/botacax/tiktok_dl", botacax_tiktok)
+    app.router.add_get("/botacax/userinfo", botacax_userinfo)
+    app.router.add_get("/media/{name}", media_file)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+async def start_gemini_stub(args):
+    """Server gRPC lokal yang meniru GenerativeService Gemini (SDK async Gemini hanya mendukung gRPC)."""
+    import grpc
+    import google.ai.generativelanguage as glm
+
+    def response_for(text):
+        return glm.GenerateContentResponse(candidates=[glm.Candidate(
+            content=glm.Content(parts=[glm.Part(text=text)], role="model"),
+            finish_reason=glm.Candidate.FinishReason.STOP,
+        )])
+
+    async def generate(request, context):
+        await asyncio.sleep(jittered(args.ai_latency, args.jitter))
+        return response_for(STUB_ANSWER)
+
+    async def stream_generate(request, context):
+        await asyncio.sleep(jittered(args.ai_latency, args.jitter))
+        for start in range(0, len(STUB_ANSWER), 40):
+            yield response_for(STUB_ANSWER[start:start + 40])
+            await asyncio.sleep(0.02)
+
+    handler = grpc.method_handlers_generic_handler("google.ai.generativelanguage.v1beta.GenerativeService", {
+        "GenerateContent": grpc.unary_unary_rpc_method_handler(
+            generate, request_deserializer=glm.GenerateContentRequest.deserialize,
+            response_serializer=glm.GenerateContentResponse.serialize),
+        "StreamGenerateContent": grpc.unary_stream_rpc_method_handler(
+            stream_generate, request_deserializer=glm.GenerateContentRequest.deserialize,
+            response_serializer=glm.GenerateContentResponse.serialize),
+    })
+    server = grpc.aio.server()
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    return server, f"127.0.0.1:{port}"
+
+def attach_gemini_stub(address):
+    """Mengarahkan model Gemini bot ke stub gRPC lewat channel tanpa TLS."""
+    import grpc
+    import google.ai.generativelanguage as glm
+    from google.ai.generativelanguage_v1beta.services.generative_service.transports import GenerativeServiceGrpcAsyncIOTransport
+    from features.ai import get_gemini_model
+
+    transport = GenerativeServiceGrpcAsyncIOTransport(channel=grpc.aio.insecure_channel(address))
+    get_gemini_model()._async_client = glm.GenerativeServiceAsyncClient(transport=transport)
+
+class InMemoryCollection:
+    """Pengganti koleksi motor: subset query/update yang dipakai bot, disimpan di dict."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.docs = {}
+
+    async def _wait(self):
+        await asyncio.sleep(self.latency)
+
+    @classmethod
+    def _match_value(cls, value, condition):
+        if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+            checks = {
+                "$gt": lambda v, c: v is not None and v > c, "$gte": lambda v, c: v is not None and v >= c,
+                "$lt": lambda v, c: v is not None and v < c, "$lte": lambda v, c: v is not None and v <= c,
+                "$ne": lambda v, c: v != c, "$in": lambda v, c: v in c, "$exists": lambda v, c: (v is not None) == c,
+            }
+            return all(checks[op](value, operand) for op, operand in condition.items())
+        return value == condition
+
+    @classmethod
+    def _matches(cls, doc, query):
+        for key, condition in query.items():
+            if key == "$or":
+                if not any(cls._matches(doc, sub) for sub in condition):
+                    return False
+            elif not cls._match_value(doc.get(key), condition):
+                return False
+        return True
+
+    def _find(self, query):
+        if "_id" in query and not isinstance(query["_id"], dict):
+            doc = self.docs.get(query["_id"])
+            return [doc] if doc is not None and self._matches(doc, query) else []
+        return [doc for doc in self.docs.values() if self._matches(doc, query)]
+
+    def _apply(self, query, update, upsert):
+        docs = self._find(query)
+        inserted = not docs
+        if inserted:
+            if not upsert:
+                return None, False
+            doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+            doc.update(update.get("$setOnInsert", {}))
+            self.docs[doc.setdefault("_id", os.urandom(6).hex())] = doc
+        else:
+            doc = docs[0]
+        doc.update(update.get("$set", {}))
+        for key, amount in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + amount
+        return doc, inserted
+
+    async def find_one(self, query, *args, **kwargs):
+        await self._wait()
+        docs = self._find(query)
+        return dict(docs[0]) if docs else None
+
+    async def insert_one(self, doc, *args, **kwargs):
+        await self._wait()
+        doc = dict(doc)
+        self.docs[doc.setdefault("_id", os.urandom(6).hex())] = doc
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def update_one(self, query, update, upsert=False, **kwargs):
+        await self._wait()
+        doc, inserted = self._apply(query, update, upsert)
+        return SimpleNamespace(matched_count=int(doc is not None and not inserted), upserted_id=doc["_id"] if inserted else None)
+
+    async def update_many(self, query, update, upsert=False, **kwargs):
+        await self._wait()
+        docs = self._find(query)
+        for doc in docs:
+            self._apply({"_id": doc["_id"]}, update, False)
+        return SimpleNamespace(matched_count=len(docs), modified_count=len(docs))
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=False, **kwargs):
+        await self._wait()
+        docs = self._find(query)
+        before = dict(docs[0]) if docs else None
+        doc, _ = self._apply(query, update, upsert)
+        return dict(doc) if return_document and doc is not None else before
+
+    async def delete_one(self, query, **kwargs):
+        await self._wait()
+        docs = self._find(query)
+        if docs:
+            del self.docs[docs[0]["_id"]]
+        return SimpleNamespace(deleted_count=len(docs[:1]))
+
+    async def delete_many(self, query, **kwargs):
+        await self._wait()
+        docs = self._find(query)
+        for doc in docs:
+            del self.docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=len(docs))
+
+    async def bulk_write(self, operations, ordered=True, **kwargs):
+        await self._wait()
+        for operation in operations: # pymongo.UpdateOne
+            self._apply(operation._filter, operation._doc, operation._upsert)
+        return SimpleNamespace(matched_count=len(operations), modified_count=len(operations), upserted_ids={})
+
+    async def create_index(self, keys, **kwargs):
+        return "bench_index"
+
+class InMemoryDatabase:
+    def __init__(self, client, latency):
+        self.client = client
+        self.latency = latency
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, InMemoryCollection(self.latency))
+
+class InMemoryMongoClient:
+    """Pengganti AsyncIOMotorClient untuk core.get_mongo_db()."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.databases = {}
+        self.admin = SimpleNamespace(command=self._command)
+
+    async def _command(self, name, *args, **kwargs):
+        return {"ok": 1}
+
+    def __getitem__(self, name):
+        return self.databases.setdefault(name, InMemoryDatabase(self, self.latency))
+
+# --- Telegram palsu ---
+
+class FakeTelegram:
+    """Pengganti client Pyrogram: mencatat pesan keluar dan mensimulasikan latency API serta kecepatan upload."""
+
+    def __init__(self, latency, upload_mbps, jitter):
+        self.latency = latency
+        self.upload_bytes_per_second = upload_mbps * 1_000_000 / 8
+        self.jitter = jitter
+        self.next_message_id = 1
+        self.next_file_id = 1
+        self.stats = {"messages": 0, "edits": 0, "uploads": 0, "upload_bytes": 0}
+
+    async def call(self, upload_bytes=0):
+        await asyncio.sleep(jittered(self.latency, self.jitter) + upload_bytes / self.upload_bytes_per_second)
+
+    def new_message(self, user, text, outgoing=True):
+        message = FakeMessage(self, user, self.next_message_id, text)
+        self.next_message_id += 1
+        if outgoing:
+            self.stats["messages"] += 1
+        return message
+
+    def new_file_id(self):
+        self.next_file_id += 1
+        return f"bench-file-{self.next_file_id}"
+
+    async def upload(self, media, user, kind):
+        if isinstance(media, str) and media.startswith("bench-file-"):
+            size, file_id = 0, media # Kirim ulang dari file_id: tanpa upload
+        else:
+            size, file_id = upload_size(media), self.new_file_id()
+            self.stats["uploads"] += 1
+            self.stats["upload_bytes"] += size
+        await self.call(size)
+        sent = self.new_message(user, "")
+        setattr(sent, kind, SimpleNamespace(file_id=file_id))
+        return sent
+
+def upload_size(media):
+    if hasattr(media, "getbuffer"):
+        return len(media.getbuffer())
+    if isinstance(media, str) and os.path.isfile(media):
+        return os.path.getsize(media)
+    return 0 # URL (mis. TikTok) diunduh sendiri oleh Telegram
+
+class FakeMessage:
+    """Pesan Pyrogram palsu dengan method yang dipakai handler (reply_*, edit_text)."""
+
+    def __init__(self, telegram, user, message_id, text):
+        self.telegram = telegram
+        self.id = message_id
+        self.from_user = user
+        self.chat = SimpleNamespace(id=user.id, type="private")
+        self.text = text
+        self.command = text.lstrip("/").split() if text.startswith("/") else None
+        self.empty = False
+        self.audio = self.video = self.document = None
+        self.replies = [] # Semua teks yang dikirim bot sebagai balasan pesan ini (termasuk edit)
+
+    async def reply_text(self, text, **kwargs):
+        await self.telegram.call()
+        self.replies.append(text)
+        reply = self.telegram.new_message(self.from_user, text)
+        reply.replies = self.replies # Edit pesan status ikut tercatat sebagai hasil permintaan asal
+        return reply
+
+    async def edit_text(self, text, **kwargs):
+        await self.telegram.call()
+        self.telegram.stats["edits"] += 1
+        self.text = text
+        self.replies.append(text)
+        return self
+
+    async def delete(self, *args, **kwargs):
+        await self.telegram.call()
+
+    async def reply_audio(self, audio, **kwargs):
+        self.replies.append("audio")
+        return await self.telegram.upload(audio, self.from_user, "audio")
+
+    async def reply_video(self, video, **kwargs):
+        self.replies.append("video")
+        return await self.telegram.upload(video, self.from_user, "video")
+
+    async def reply_document(self, document, **kwargs):
+        self.replies.append("document")
+        return await self.telegram.upload(document, self.from_user, "document")
+
+    async def reply_media_group(self, media, **kwargs):
+        self.replies.append("media_group")
+        return [await self.telegram.upload(item.media, self.from_user, "audio") for item in media]
+
+def classify(replies):
+    """Menentukan hasil satu permintaan dari balasan terakhir bot: ok, rejected atau failed."""
+    last = replies[-1] if replies else ""
+    if last.startswith("🚫") or last.startswith("⏳ Antrean") or "sedang penuh" in last:
+        return "rejected"
+    if last.startswith("❌") or "Terjadi kesalahan" in last or "gagal" in last.lower():
+        return "failed"
+    return "ok"
+
+# --- Pengukuran ---
+
+def reset_peak_rss():
+    """Mengembalikan puncak RSS (VmHWM) ke RSS saat ini agar puncak bisa diukur per skenario (khusus Linux)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def peak_rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # Linux: KB, puncak seumur proses
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))]
+
+def scenario_argument(scenario, stub_url, n):
+    if scenario == "start":
+        return ""
+    if scenario in ("ask_openai", "ask_gemini"):
+        return f"Jelaskan konsep nomor {n} secara singkat"
+    if scenario == "tiktok":
+        return f"https://www.tiktok.com/@bench/video/{7000000000000000000 + n}"
+    if scenario == "song":
+        return f"{stub_url}/media/song-{n}.mp3"
+    return f"{stub_url}/media/video-{n}.mp4"
+
+async def run_scenario(scenario, args, telegram, stub_url, core):
+    import importlib
+
+    module_name, handler_name, command = SCENARIOS[scenario]
+    handler = getattr(importlib.import_module(f"features.{module_name}"), handler_name)
+    counter = iter(range(1, 10**9))
+    latencies, outcomes = [], {"ok": 0, "rejected": 0, "failed": 0}
+
+    async def synthetic_user(index):
+        # ID berbeda per skenario agar token bucket skenario sebelumnya tidak ikut terpakai
+        user_id = 900_000_000 + list(SCENARIOS).index(scenario) * 1_000_000 + index
+        user = SimpleNamespace(id=user_id, first_name=f"Bench{index}", username=None, is_bot=False)
+        if args.privileged:
+            core.OWNER_IDS.add(user.id)
+        for _ in range(args.requests):
+            n = 0 if random.random() < args.hit_ratio else next(counter)
+            argument = scenario_argument(scenario, stub_url, n)
+            message = telegram.new_message(user, f"/{command} {argument}".strip(), outgoing=False)
+            started = time.perf_counter()
+            try:
+                task = await handler(None, message)
+                if isinstance(task, asyncio.Task): # Handler fair_scheduled berjalan di task terpisah
+                    await task
+                outcome = classify(message.replies)
+            except Exception as e:
+                logger.debug(f"Permintaan {scenario} gagal: {e!r}")
+                outcome = "failed"
+            latencies.append(time.perf_counter() - started)
+            outcomes[outcome] += 1
+            if args.think_time:
+                await asyncio.sleep(args.think_time)
+
+    core.metrics.reset()
+    reset_peak_rss()
+    if args.tracemalloc:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    await asyncio.gather(*(synthetic_user(index) for index in range(args.users)))
+    elapsed = time.perf_counter() - started
+
+    backends = {}
+    for (name, labels), histogram in core.metrics.histograms.items():
+        if name == "bot_backend_seconds":
+            labels = dict(labels)
+            backends[f"{labels['backend']}:{labels['op']}"] = {
+                "count": histogram["count"],
+                "avg_ms": round(histogram["sum"] / histogram["count"] * 1000, 1),
+            }
+    return {
+        "scenario": scenario,
+        "requests": len(latencies),
+        **outcomes,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+        "peak_rss_mb": round(peak_rss_bytes() / 1024 / 1024, 1),
+        "peak_python_mb": round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1) if args.tracemalloc else None,
+        "backends": backends,
+    }
+
+def print_results(results):
+    header = f"{'skenario':<11}{'req':>6}{'ok':>6}{'tolak':>7}{'gagal':>7}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'RSS MB':>9}"
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<11}{r['requests']:>6}{r['ok']:>6}{r['rejected']:>7}{r['failed']:>7}{r['throughput_rps']:>9}"
+            f"{r['p50_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}{r['peak_rss_mb']:>9}"
+            + (f"  (python {r['peak_python_mb']} MB)" if r["peak_python_mb"] is not None else "")
+        )
+    for r in results:
+        if r["backends"]:
+            details = ", ".join(f"{key} {value['count']}x {value['avg_ms']}ms" for key, value in sorted(r["backends"].items()))
+            print(f"  {r['scenario']} backend: {details}")
+
+def compare_with_baseline(results, path, max_regression):
+    """Membandingkan dengan hasil terakhir per skenario di file baseline. Mengembalikan daftar regresi."""
+    baseline = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                baseline[entry["scenario"]] = entry
+    regressions = []
+    for r in results:
+        old = baseline.get(r["scenario"])
+        if not old:
+            continue
+        if old["throughput_rps"] and r["throughput_rps"] < old["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{r['scenario']}: throughput {old['throughput_rps']} -> {r['throughput_rps']} req/s")
+        if old["p99_ms"] and r["p99_ms"] > old["p99_ms"] * (1 + max_regression):
+            regressions.append(f"{r['scenario']}: p99 {old['p99_ms']} -> {r['p99_ms']} ms")
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+async def run(args, workdir):
+    media_dir = prepare_media(args, workdir)
+    http_runner, stub_url = await start_http_stub(args, media_dir)
+    gemini_server = gemini_address = None
+    if "ask_gemini" in args.scenario:
+        try:
+            gemini_server, gemini_address = await start_gemini_stub(args)
+        except ImportError as e:
+            logger.warning(f"Skenario ask_gemini dilewati, SDK Gemini/grpc tidak terpasang: {e}")
+            args.scenario.remove("ask_gemini")
+
+    # Konfigurasi harus diubah sebelum core/features di-import karena nilainya dibaca saat import
+    config.OPENAI_API_KEY = config.GEMINI_API_KEY = config.BOTACAX_API_KEY = "benchmark"
+    config.OPENAI_BASE_URL = f"{stub_url}/openai/v1"
+    config.BOTACAX_BASE_URL = f"{stub_url}/botacax/"
+    config.BOTACAX_USERINFO_ENDPOINT = "userinfo"
+    config.BOTACAX_TIKTOK_DOWNLOAD_ENDPOINT = "tiktok_dl"
+    config.DOWNLOAD_DIR = os.path.join(workdir, "downloads")
+    config.COOKIES_FILE = os.path.join(workdir, "cookies.txt") # Tidak ada: stub media tidak butuh cookies YouTube
+    config.METRICS_PORT = 0
+
+    import core
+    core._mongo_client = InMemoryMongoClient(args.mongo_latency)
+    modules = {SCENARIOS[scenario][0] for scenario in args.scenario}
+    for module in sorted(modules):
+        __import__(f"features.{module}")
+    await core.init_mongo()
+    await core.run_startup_hooks()
+    if gemini_address:
+        attach_gemini_stub(gemini_address)
+
+    telegram = FakeTelegram(args.telegram_latency, args.upload_mbps, args.jitter)
+    results = []
+    try:
+        for scenario in args.scenario:
+            print(f"Menjalankan {scenario}: {args.users} pengguna x {args.requests} permintaan...", flush=True)
+            results.append(await run_scenario(scenario, args, telegram, stub_url, core))
+    finally:
+        await core.run_shutdown_hooks()
+        if gemini_server:
+            await gemini_server.stop(None)
+        await http_runner.cleanup()
+    return results, telegram.stats
+
+def main():
+    args = parse_args()
+    # Dipanggil sebelum core di-import sehingga basicConfig milik core tidak berpengaruh
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    random.seed(args.seed)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    with tempfile.TemporaryDirectory(prefix="bot-benchmark-") as workdir:
+        os.environ.setdefault("GRPC_VERBOSITY", "ERROR")
+        results, telegram_stats = asyncio.run(run(args, workdir))
+
+    print_results(results)
+    print(f"\nTelegram palsu: {telegram_stats['messages']} pesan, {telegram_stats['edits']} edit, "
+          f"{telegram_stats['uploads']} upload ({telegram_stats['upload_bytes'] / 1024 / 1024:.1f} MB)")
+
+    if args.output:
+        revision = git_revision()
+        settings = {key: getattr(args, key) for key in ("users", "requests", "think_time", "hit_ratio", "privileged", "ai_latency", "botacax_latency", "telegram_latency")}
+        with open(args.output, "a") as f:
+            for r in results:
+                f.write(json.dumps({"timestamp": datetime.now().isoformat(timespec="seconds"), "revision": revision, "settings": settings, **r}) + "\n")
+        print(f"Hasil ditambahkan ke {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.max_regression)
+        if regressions:
+            print("\n❌ Regresi dibanding baseline:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+        print("\n✅ Tidak ada regresi dibanding baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1247 @@
+# core.py
+# Komponen bersama untuk semua modul fitur: client bot, MongoDB, helper, penjadwal dan client BotAcax.
+
+import logging
+import logging.handlers
+import asyncio
+import atexit
+import copy
+import json
+import queue
+import contextlib
+import contextvars
+import time
+import functools
+import math
+import random
+import bisect
+import os
+import sys
+import threading
+import traceback
+import aiohttp
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+from pyrogram import Client
+from pyrogram.errors import FloodWait, MessageNotModified, BadRequest
+
+# Impor konfigurasi dari config.py
+from config import (
+    API_ID, API_HASH, BOT_TOKEN, MONGO_URI, MONGO_TIMEOUT, MONGO_RETRY_INTERVAL, OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_PRIVATE_INTERVAL, OUTBOUND_GROUP_INTERVAL, OUTBOUND_MAX_FLOOD_WAIT, OUTBOUND_MAX_RETRIES,
+    OUTBOUND_DROPPABLE_MAX_DELAY, SCHEDULER_MAX_CONCURRENT, SCHEDULER_MAX_QUEUE,
+    SCHEDULER_MAX_QUEUE_PER_USER, SCHEDULER_DEFAULT_DURATION, USER_RATE_PER_MINUTE, USER_RATE_BURST,
+    COMMAND_COSTS, BOTACAX_BASE_URL, BOTACAX_API_KEY, BOTACAX_MAX_CONCURRENCY, BOTACAX_TIMEOUT,
+    BOTACAX_MAX_RETRIES, BOTACAX_BACKOFF_BASE, BOTACAX_BACKOFF_MAX, BOTACAX_BREAKER_THRESHOLD,
+    BOTACAX_BREAKER_RESET, BOT_ROLE, METRICS_LATENCY_BUCKETS, LOOP_STALL_THRESHOLD, LOOP_STALL_CHECK_INTERVAL,
+    LOOP_STALL_STACK_DEPTH, LOG_LEVEL, LOG_LEVELS, LOG_CONSOLE_FORMAT, LOG_FILE, LOG_FILE_FORMAT, LOG_MAX_BYTES,
+    LOG_BACKUP_COUNT, LOG_ROTATE_WHEN, LOG_QUEUE_SIZE, LOG_MAX_MESSAGE_LENGTH, LOG_SAMPLE_WINDOW, LOG_SAMPLE_BURST,
+    LOG_SAMPLE_MAX_LEVEL
+)
+
+# --- Konfigurasi Logging ---
+# Handler di thread pemanggil hanya memasukkan record ke antrean; format JSON/teks dan tulis ke disk
+# dikerjakan QueueListener di thread terpisah sehingga event loop tidak pernah menunggu I/O log.
+
+LOG_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "suppressed"}
+
+def truncate_text(text, limit=LOG_MAX_MESSAGE_LENGTH):
+    """Memotong teks panjang (mis. payload respons API) agar aman ditulis ke log."""
+    text = str(text)
+    if not limit or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... (+{len(text) - limit} karakter)"
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per baris; atribut dari `extra=` ikut disimpan sebagai field."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate_text(record.getMessage()),
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in LOG_RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value if isinstance(value, (int, float, bool, type(None))) else truncate_text(value)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Format teks lama, dengan pesan dipotong dan jumlah pesan yang dilewati sampling."""
+
+    def formatMessage(self, record):
+        record.message = truncate_text(record.message)
+        if getattr(record, "suppressed", 0):
+            record.message += f" (+{record.suppressed} pesan serupa dilewati)"
+        return super().formatMessage(record)
+
+class SamplingFilter(logging.Filter):
+    """Membatasi pesan bervolume tinggi: maks LOG_SAMPLE_BURST pesan per baris kode per LOG_SAMPLE_WINDOW detik."""
+
+    def __init__(self, window, burst, max_level):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.max_level = max_level
+        self.sites = {} # (path, baris) -> [awal_jendela, jumlah_pesan, jumlah_dilewati]
+        self.suppressed = 0
+
+    def filter(self, record):
+        if not self.burst or record.levelno > self.max_level:
+            return True
+        now = time.monotonic()
+        site = self.sites.get((record.pathname, record.lineno))
+        if site is None or now - site[0] >= self.window:
+            suppressed = site[2] if site else 0
+            self.sites[(record.pathname, record.lineno)] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if site[1] < self.burst:
+            site[1] += 1
+            return True
+        site[2] += 1
+        self.suppressed += 1
+        return False
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler yang membuang pesan (dan menghitungnya) saat antrean penuh, bukan menunggu atau error."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Cukup bekukan argumen pesan; format lengkap dikerjakan di thread listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def setup_logging():
+    """Memasang pipeline logging non-blocking. Tidak melakukan apa pun jika root logger sudah dikonfigurasi."""
+    root = logging.getLogger()
+    if root.handlers: # mis. benchmark.py memanggil basicConfig sebelum core di-import
+        return None
+    formatters = {
+        "json": JsonFormatter(),
+        "text": TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'),
+    }
+    console = logging.StreamHandler()
+    console.setFormatter(formatters[LOG_CONSOLE_FORMAT])
+    handlers = [console]
+    if LOG_FILE:
+        os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+        if LOG_ROTATE_WHEN:
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                LOG_FILE, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+        file_handler.setFormatter(formatters[LOG_FILE_FORMAT])
+        handlers.append(file_handler)
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    queue_handler.sampler = SamplingFilter(LOG_SAMPLE_WINDOW, LOG_SAMPLE_BURST, logging.getLevelName(LOG_SAMPLE_MAX_LEVEL))
+    queue_handler.addFilter(queue_handler.sampler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    for name, level in LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop) # Pesan yang masih di antrean ditulis sebelum proses berhenti
+    return queue_handler
+
+log_handler = setup_logging()
+logger = logging.getLogger(__name__)
+
+# --- Metrik ---
+
+class Metrics:
+    """Registry metrik di memori (counter, gauge dan histogram latency) untuk /stats dan endpoint Prometheus.
+
+    Semua update dilakukan dari event loop sehingga tidak perlu lock. Nilai yang sudah dicatat komponen
+    lain (mis. `stats` milik scheduler) diekspor lewat collector agar tidak dihitung dua kali.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counters = {} # (nama, label) -> nilai
+        self.gauges = {}
+        self.histograms = {} # (nama, label) -> {"buckets": [jumlah per bucket], "count": n, "sum": detik}
+        self.collectors = [] # Fungsi tanpa argumen yang mengembalikan [(nama, tipe, label, nilai)]
+        self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            histogram["buckets"][index] += 1
+        histogram["count"] += 1
+        histogram["sum"] += value
+
+    @contextlib.asynccontextmanager
+    async def track(self, prefix, **labels):
+        """Mengukur satu operasi async: `<prefix>_seconds`, `<prefix>_in_flight` dan `<prefix>_errors_total`."""
+        self.add_gauge(f"{prefix}_in_flight", 1, **labels)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc(f"{prefix}_errors_total", error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.add_gauge(f"{prefix}_in_flight", -1, **labels)
+            self.observe(f"{prefix}_seconds", time.perf_counter() - started, **labels)
+
+    def reset(self):
+        """Mengosongkan counter dan histogram (gauge in-flight dibiarkan karena operasinya masih berjalan)."""
+        self.counters.clear()
+        self.histograms.clear()
+        self.started = time.time()
+
+    def register_collector(self, func):
+        """Mendaftarkan fungsi yang membaca nilai metrik saat di-scrape (kedalaman antrean, counter bawaan komponen)."""
+        self.collectors.append(func)
+        return func
+
+    def quantile(self, histogram, q):
+        """Perkiraan kuantil dari histogram (batas atas bucket), None jika belum ada data."""
+        if not histogram["count"]:
+            return None
+        target = q * histogram["count"]
+        seen = 0
+        for bound, count in zip(self.buckets, histogram["buckets"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return math.inf
+
+    def errors_for(self, prefix, labels):
+        """Total error (semua jenis) untuk satu kombinasi label."""
+        labels = dict(labels)
+        return sum(
+            value for (name, key), value in self.counters.items()
+            if name == f"{prefix}_errors_total" and all(dict(key).get(k) == v for k, v in labels.items())
+        )
+
+    def collect(self):
+        """Semua sampel non-histogram sebagai [(nama, tipe, label, nilai)]."""
+        samples = [(name, "counter", dict(labels), value) for (name, labels), value in self.counters.items()]
+        samples += [(name, "gauge", dict(labels), value) for (name, labels), value in self.gauges.items()]
+        samples.append(("bot_uptime_seconds", "gauge", {}, time.time() - self.started))
+        for collector in self.collectors:
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                logger.debug(f"Collector metrik {collector.__name__} gagal: {e}")
+        return samples
+
+    @staticmethod
+    def format_labels(labels):
+        if not labels:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+        return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+    def render_prometheus(self):
+        """Semua metrik dalam format teks Prometheus (text/plain; version=0.0.4)."""
+        families = {}
+        for name, kind, labels, value in self.collect():
+            families.setdefault(name, (kind, []))[1].append(f"{name}{self.format_labels(labels)} {value}")
+        for (name, labels), histogram in self.histograms.items():
+            lines = families.setdefault(name, ("histogram", []))[1]
+            labels = dict(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{self.format_labels({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{name}_bucket{self.format_labels({**labels, 'le': '+Inf'})} {histogram['count']}")
+            lines.append(f"{name}_sum{self.format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{self.format_labels(labels)} {histogram['count']}")
+        output = []
+        for name in sorted(families):
+            kind, lines = families[name]
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+metrics = Metrics(METRICS_LATENCY_BUCKETS)
+
+@metrics.register_collector
+def _log_metrics():
+    if log_handler is None:
+        return []
+    return [
+        ("bot_log_queued", "gauge", {}, log_handler.queue.qsize()),
+        ("bot_log_dropped_total", "counter", {}, log_handler.dropped),
+        ("bot_log_sampled_out_total", "counter", {}, log_handler.sampler.suppressed),
+    ]
+
+def track_backend(backend, op):
+    """Mengukur satu panggilan ke backend (MongoDB, OpenAI, Gemini, BotAcax, yt-dlp, FFmpeg, Telegram)."""
+    return metrics.track("bot_backend", backend=backend, op=op)
+
+def record_bytes(backend, direction, size):
+    """Mencatat byte yang diterima ("in") atau dikirim ("out") sebuah backend."""
+    if size:
+        metrics.inc("bot_backend_bytes_total", size, backend=backend, direction=direction)
+
+def instrument_handler(func):
+    """Membungkus handler pesan agar latency, error dan jumlah yang sedang berjalan tercatat per handler."""
+    @functools.wraps(func)
+    async def wrapper(client, message):
+        with stall_detector.running(func.__name__):
+            async with metrics.track("bot_handler", handler=func.__name__):
+                return await func(client, message)
+    return wrapper
+
+# --- Detektor Event Loop Tersendat (opsional, untuk debugging) ---
+
+class LoopStallDetector:
+    """Mendeteksi kode yang memblokir event loop lebih lama dari `threshold` detik.
+
+    Coroutine heartbeat mengukur lag loop terus-menerus. Thread watchdog terpisah memotret stack thread
+    event loop saat heartbeat terlambat, sehingga terlihat baris kode yang sedang memblokir beserta
+    handler yang menjalankannya. Kejadian dikelompokkan per (handler, lokasi kode) untuk laporan /stalls.
+    """
+
+    def __init__(self, threshold, check_interval, stack_depth):
+        self.threshold = threshold
+        self.check_interval = check_interval
+        self.stack_depth = stack_depth
+        self.enabled = False
+        self.loop = None
+        self.loop_thread_id = None
+        self.last_beat = 0.0
+        self.handlers = {} # task -> nama handler yang sedang berjalan di task tersebut
+        self.stalls = {} # (handler, lokasi) -> ringkasan kejadian
+        self._capture = None # Stack yang dipotret watchdog untuk stall yang sedang berlangsung
+        self._stop = threading.Event()
+        self._tasks = []
+
+    @contextlib.contextmanager
+    def running(self, handler):
+        """Menandai task saat ini sedang menjalankan `handler` agar stall bisa diatribusikan ke perintahnya."""
+        task = asyncio.current_task() if self.enabled else None
+        if task is None:
+            yield
+            return
+        self.handlers[task] = handler
+        try:
+            yield
+        finally:
+            self.handlers.pop(task, None)
+
+    def start(self):
+        """Mulai memantau loop yang sedang berjalan. Harus dipanggil dari dalam event loop."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+        self._tasks = [asyncio.create_task(self._heartbeat())]
+        threading.Thread(target=self._watchdog, name="loop-stall-watchdog", daemon=True).start()
+        logger.warning(f"Detektor event loop tersendat aktif (ambang {self.threshold * 1000:.0f}ms). Jangan dipakai terus di produksi.")
+
+    def stop(self):
+        self.enabled = False
+        self._stop.set()
+        for task in self._tasks:
+            task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.check_interval
+            await asyncio.sleep(self.check_interval)
+            now = time.monotonic()
+            self.last_beat = now
+            lag = max(0.0, now - expected)
+            metrics.observe("bot_event_loop_lag_seconds", lag)
+            capture, self._capture = self._capture, None
+            if lag >= self.threshold:
+                self._record(lag, capture)
+
+    def _watchdog(self):
+        """Berjalan di thread sendiri: memotret stack loop saat heartbeat terlambat lebih dari ambang."""
+        while not self._stop.wait(self.check_interval / 2):
+            if self._capture is not None or time.monotonic() - self.last_beat < self.check_interval + self.threshold / 2:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self.loop)
+            handler = self.handlers.get(task) or (f"task:{task.get_name()}" if task else "callback")
+            self._capture = (handler, traceback.extract_stack(frame)[-self.stack_depth:])
+
+    @staticmethod
+    def _blame(stack):
+        """Frame terdalam yang berasal dari kode bot (bukan library), sebagai lokasi penyebab stall."""
+        root = os.path.dirname(os.path.abspath(__file__))
+        for frame in reversed(stack):
+            if frame.filename.startswith(root) and "site-packages" not in frame.filename:
+                return f"{os.path.relpath(frame.filename, root)}:{frame.lineno} {frame.name}"
+        return f"{stack[-1].filename}:{stack[-1].lineno} {stack[-1].name}" if stack else "?"
+
+    def _record(self, lag, capture):
+        if capture:
+            handler, stack = capture
+            location = self._blame(stack)
+        else:
+            handler, stack, location = "?", [], "? (stack tidak sempat dipotret)"
+        entry = self.stalls.setdefault((handler, location), {"count": 0, "total": 0.0, "max": 0.0, "stack": None, "last_at": None})
+        entry["count"] += 1
+        entry["total"] += lag
+        entry["last_at"] = time.time()
+        if lag >= entry["max"] or entry["stack"] is None:
+            entry["max"] = lag
+            entry["stack"] = "".join(traceback.format_list(stack)) if stack else None
+        metrics.inc("bot_event_loop_stalls_total", handler=handler)
+        logger.warning(f"Event loop tersendat {lag * 1000:.0f}ms di {location} (handler: {handler}).")
+
+    def report(self):
+        """Laporan teks semua stall, diurutkan dari total waktu blokir terbesar."""
+        if not self.stalls:
+            return "Belum ada stall event loop yang tercatat."
+        lines = [f"Stall event loop > {self.threshold * 1000:.0f}ms, diurutkan dari total waktu blokir:\n"]
+        ranked = sorted(self.stalls.items(), key=lambda item: item[1]["total"], reverse=True)
+        for rank, ((handler, location), entry) in enumerate(ranked, 1):
+            lines.append(
+                f"#{rank} {location}\n"
+                f"    handler: {handler} | {entry['count']}x | total {entry['total']:.2f}s | "
+                f"maks {entry['max'] * 1000:.0f}ms | terakhir {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['last_at']))}"
+            )
+            if entry["stack"]:
+                lines.append("    Stack saat stall terlama:\n" + "\n".join(f"    {line}" for line in entry["stack"].splitlines()))
+            lines.append("")
+        return "\n".join(lines)
+
+    def reset(self):
+        self.stalls.clear()
+
+stall_detector = LoopStallDetector(LOOP_STALL_THRESHOLD, LOOP_STALL_CHECK_INTERVAL, LOOP_STALL_STACK_DEPTH)
+
+# --- Inisialisasi MongoDB ---
+
+_mongo_client = None
+_mongo_indexes = [] # (koleksi, keys, opsi) yang dibuat init_mongo setelah MongoDB bisa dihubungi
+mongo_ready = False
+
+def get_mongo_db():
+    """Database bot. Client motor (dan driver-nya) baru dibuat saat pertama kali dibutuhkan."""
+    global _mongo_client
+    if _mongo_client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient # Driver async: query MongoDB tidak memblokir event loop
+        _mongo_client = AsyncIOMotorClient(MONGO_URI, serverSelectionTimeoutMS=int(MONGO_TIMEOUT * 1000))
+    return _mongo_client["telegram_checker_db"]
+
+class LazyCollection:
+    """Koleksi MongoDB yang bisa didefinisikan saat modul di-import tanpa membuka koneksi."""
+
+    def __init__(self, name):
+        self.name = name
+
+    TRACKED_OPS = {
+        "find_one", "find_one_and_update", "insert_one", "insert_many", "update_one", "update_many",
+        "replace_one", "delete_one", "delete_many", "bulk_write", "count_documents", "create_index"
+    }
+
+    def __getattr__(self, attr):
+        value = getattr(get_mongo_db()[self.name], attr)
+        if attr not in self.TRACKED_OPS:
+            return value # Cursor (find/aggregate) tidak diukur
+        name = self.name
+
+        async def tracked(*args, **kwargs):
+            async with track_backend("mongodb", f"{name}.{attr}"):
+                return await value(*args, **kwargs)
+        return tracked
+
+def utc_now():
+    """Waktu sekarang dalam UTC tanpa tzinfo, sama seperti datetime yang dikembalikan MongoDB.
+
+    Dipakai untuk field yang dibandingkan atau diindeks TTL (expireAfterSeconds) oleh MongoDB, yang selalu menganggapnya UTC.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def register_index(collection, keys, **options):
+    """Mendaftarkan index yang dibuat oleh init_mongo."""
+    _mongo_indexes.append((collection, keys, options))
+
+async def _setup_mongo():
+    await get_mongo_db().client.admin.command("ping")
+    for collection, keys, options in _mongo_indexes:
+        await collection.create_index(keys, **options)
+
+async def init_mongo():
+    """Menghubungi MongoDB dan membuat index yang didaftarkan modul fitur.
+
+    Jika MongoDB lambat atau mati, bot tetap berjalan (perintah yang butuh database gagal dengan
+    pesan error) dan koneksi dicoba lagi setiap MONGO_RETRY_INTERVAL detik.
+    """
+    global mongo_ready
+    while True:
+        try:
+            await asyncio.wait_for(_setup_mongo(), MONGO_TIMEOUT)
+            mongo_ready = True
+            logger.info("Koneksi MongoDB berhasil.")
+            return
+        except Exception as e:
+            logger.error(f"Gagal terhubung ke MongoDB ({e!r}); bot berjalan tanpa database, dicoba lagi dalam {MONGO_RETRY_INTERVAL} detik.")
+            await asyncio.sleep(MONGO_RETRY_INTERVAL)
+
+bot_role = BOT_ROLE # Ditimpa argumen --role oleh main.py
+metrics_port = None # Ditimpa argumen --metrics-port oleh main.py; None = sesuai role (METRICS_PORT/METRICS_WORKER_PORT)
+
+# --- Muat Owner dan Admin dari File ---
+OWNER_IDS = set()
+ADMIN_IDS = set()
+
+def load_ids_from_file(filename):
+    ids = set()
+    try:
+        with open(filename, 'r') as f:
+            for line in f:
+                try:
+                    ids.add(int(line.strip()))
+                except ValueError:
+                    logger.warning(f"Melewatkan baris tidak valid di {filename}: {line.strip()}")
+        logger.info(f"Berhasil memuat ID dari {filename}.")
+    except FileNotFoundError:
+        logger.warning(f"File {filename} tidak ditemukan. Pastikan file ada jika ingin menggunakan fitur owner/admin.")
+    return ids
+
+OWNER_IDS = load_ids_from_file('owners.txt')
+ADMIN_IDS = load_ids_from_file('admins.txt')
+
+# --- Pengatur Pesan Keluar (Outbound Governor) ---
+
+_outbound_droppable = contextvars.ContextVar("outbound_droppable", default=False)
+
+@contextlib.contextmanager
+def droppable_outbound():
+    """Menandai pesan keluar di dalam blok ini (update progres/status) sebagai boleh dilewati saat chat sedang dibatasi."""
+    token = _outbound_droppable.set(True)
+    try:
+        yield
+    finally:
+        _outbound_droppable.reset(token)
+
+class OutboundGovernor:
+    """Mengatur semua pesan keluar bot: jeda minimum per chat, batas global per detik, dan retry FloodWait.
+
+    Pesan biasa menunggu gilirannya dan dikirim ulang setelah jeda FloodWait yang diminta Telegram.
+    Pesan yang ditandai `droppable_outbound()` langsung gagal dengan FloodWait jika chat sedang dibatasi
+    atau antreannya terlalu panjang, sehingga pemanggil (mis. safe_edit) cukup melewati update tersebut.
+    """
+
+    GOVERNED_QUERIES = {"SendMessage", "EditMessage", "SendMedia", "SendMultiMedia", "ForwardMessages"}
+
+    def __init__(self, global_rate, private_interval, group_interval, max_flood_wait, max_retries, droppable_max_delay):
+        self.global_interval = 1 / global_rate
+        self.private_interval = private_interval
+        self.group_interval = group_interval
+        self.max_flood_wait = max_flood_wait
+        self.max_retries = max_retries
+        self.droppable_max_delay = droppable_max_delay
+        self.next_chat_slot = {} # chat -> waktu (monotonic) paling awal untuk pesan berikutnya
+        self.next_global_slot = 0.0
+        self.blocked_until = {} # chat -> akhir FloodWait (monotonic)
+        self.stats = {"sent": 0, "delayed": 0, "flood_waits": 0, "dropped": 0}
+
+    @classmethod
+    def chat_key(cls, query):
+        """Mengembalikan tuple (is_private, chat) untuk query pengiriman pesan, atau None jika bukan pesan keluar."""
+        if type(query).__name__ not in cls.GOVERNED_QUERIES:
+            return None
+        peer = getattr(query, "peer", None) or getattr(query, "to_peer", None)
+        for attr in ("user_id", "chat_id", "channel_id"):
+            value = getattr(peer, attr, None)
+            if value is not None:
+                return type(peer).__name__ == "InputPeerUser", f"{attr}:{value}"
+        return True, "self"
+
+    def _prune(self, now):
+        if len(self.next_chat_slot) > 10000:
+            self.next_chat_slot = {chat: slot for chat, slot in self.next_chat_slot.items() if slot > now}
+            self.blocked_until = {chat: until for chat, until in self.blocked_until.items() if until > now}
+
+    def _reserve(self, chat, private):
+        """Memesan slot kirim untuk chat dan mengembalikan lama tunggu (detik) sampai slot tersebut."""
+        now = time.monotonic()
+        self._prune(now)
+        slot = max(now, self.next_chat_slot.get(chat, 0.0), self.blocked_until.get(chat, 0.0), self.next_global_slot)
+        self.next_chat_slot[chat] = slot + (self.private_interval if private else self.group_interval)
+        self.next_global_slot = slot + self.global_interval
+        return slot - now
+
+    async def run(self, key, call):
+        private, chat = key
+        droppable = _outbound_droppable.get()
+        for attempt in range(self.max_retries + 1):
+            if droppable:
+                now = time.monotonic()
+                pending = max(self.blocked_until.get(chat, 0.0), self.next_chat_slot.get(chat, 0.0)) - now
+                if pending > self.droppable_max_delay:
+                    self.stats["dropped"] += 1
+                    raise FloodWait(value=math.ceil(pending))
+            delay = self._reserve(chat, private)
+            if delay > 0:
+                self.stats["delayed"] += 1
+                await asyncio.sleep(delay)
+            try:
+                result = await call()
+            except FloodWait as e:
+                self.stats["flood_waits"] += 1
+                self.blocked_until[chat] = time.monotonic() + e.value
+                if droppable or e.value > self.max_flood_wait or attempt == self.max_retries:
+                    raise
+                logger.warning(f"FloodWait {e.value} detik untuk chat {chat}, pesan dikirim ulang setelah jeda (percobaan {attempt + 1}/{self.max_retries}).")
+                continue
+            self.stats["sent"] += 1
+            return result
+
+outbound_governor = OutboundGovernor(
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_PRIVATE_INTERVAL, OUTBOUND_GROUP_INTERVAL,
+    OUTBOUND_MAX_FLOOD_WAIT, OUTBOUND_MAX_RETRIES, OUTBOUND_DROPPABLE_MAX_DELAY
+)
+
+@metrics.register_collector
+def _outbound_metrics():
+    return [(f"bot_outbound_{name}_total", "counter", {}, value) for name, value in outbound_governor.stats.items()]
+
+class GovernedClient(Client):
+    """Client Pyrogram yang mengirim semua pesan keluar (reply, edit, media) lewat outbound_governor.
+
+    Setiap panggilan API Telegram dan setiap handler `on_message` juga diukur oleh `metrics`.
+    """
+
+    def on_message(self, filters=None, group=0):
+        register = super().on_message(filters, group)
+
+        def decorator(func):
+            # Handler fair_scheduled mengukur dirinya sendiri karena pekerjaan aslinya berjalan di task terpisah
+            register(func if getattr(func, "instrumented", False) else instrument_handler(func))
+            return func
+        return decorator
+
+    async def _invoke_tracked(self, query, *args, **kwargs):
+        async with track_backend("telegram", type(query).__name__):
+            return await super().invoke(query, *args, **kwargs)
+
+    async def invoke(self, query, *args, **kwargs):
+        key = outbound_governor.chat_key(query)
+        if key is None:
+            return await self._invoke_tracked(query, *args, **kwargs)
+        if len(args) < 3:
+            kwargs.setdefault("sleep_threshold", 0) # FloodWait ditangani governor, bukan tidur otomatis Pyrogram
+        return await outbound_governor.run(key, lambda: self._invoke_tracked(query, *args, **kwargs))
+
+# --- Inisialisasi Pyrogram Client (Bot) ---
+bot = GovernedClient(
+    "telegram_checker_bot",
+    api_id=API_ID,
+    api_hash=API_HASH,
+    bot_token=BOT_TOKEN
+)
+logger.info("Pyrogram Bot Client diinisialisasi.")
+
+# --- Helper Functions ---
+
+def is_owner_or_admin(user_id):
+    """Memeriksa apakah user adalah owner atau admin."""
+    return user_id in OWNER_IDS or user_id in ADMIN_IDS
+
+def owner_or_admin_only(func):
+    """Decorator untuk membatasi akses ke owner dan admin."""
+    @functools.wraps(func)
+    async def wrapper(client, message):
+        if not is_owner_or_admin(message.from_user.id):
+            await message.reply_text("⛔️ Maaf, Anda tidak memiliki izin untuk menggunakan fitur ini.")
+            return
+        await func(client, message)
+    return wrapper
+
+def owner_only(func):
+    """Decorator untuk membatasi akses hanya ke owner."""
+    @functools.wraps(func)
+    async def wrapper(client, message):
+        if message.from_user.id not in OWNER_IDS:
+            await message.reply_text("⛔️ Maaf, fitur ini hanya untuk owner bot.")
+            return
+        await func(client, message)
+    return wrapper
+
+async def run_sync(func, *args, **kwargs):
+    """Menjalankan fungsi blocking di thread pool agar event loop tidak tertahan."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+_http_session = None
+
+async def get_http_session():
+    """Session aiohttp bersama agar koneksi keep-alive dipakai ulang antar request."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_connect=15, sock_read=60))
+    return _http_session
+
+async def close_http_session():
+    if _http_session and not _http_session.closed:
+        await _http_session.close()
+
+class TTLCache:
+    """Cache LRU di memori dengan masa berlaku (TTL) per entri."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class FlightAborted(Exception):
+    """Dilempar ke pemanggil yang menunggu saat pekerjaan pemanggil pertama dibatalkan."""
+
+class SingleFlight:
+    """Menggabungkan pekerjaan identik yang berjalan bersamaan: hanya pemanggil pertama yang mengerjakan,
+    pemanggil lain menunggu dan menerima hasil yang sama."""
+
+    def __init__(self):
+        self._inflight = {}
+
+    def is_inflight(self, key):
+        return key in self._inflight
+
+    async def run(self, key, func):
+        """Menjalankan `func` untuk `key`. Mengembalikan tuple (hasil, apakah_pemanggil_pertama)."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future), False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except BaseException as e:
+            future.set_exception(FlightAborted() if isinstance(e, asyncio.CancelledError) else e)
+            future.exception() # Tandai sudah dibaca agar tidak muncul warning jika tidak ada yang menunggu
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            self._inflight.pop(key, None)
+
+# --- Penjadwal Adil untuk Perintah Berat ---
+
+class TokenBucket:
+    """Token bucket per pengguna: kapasitas `capacity`, diisi ulang `refill_rate` token per detik."""
+
+    def __init__(self, capacity, refill_rate):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def try_consume(self, cost):
+        """Mengambil `cost` token. Mengembalikan 0 jika berhasil, atau lama tunggu (detik) sampai token cukup.
+
+        Biaya yang melebihi kapasitas tidak akan pernah bisa dipenuhi, sehingga lama tunggunya math.inf.
+        """
+        self._refill()
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0
+        if cost > self.capacity:
+            return math.inf
+        return (cost - self.tokens) / self.refill_rate
+
+    def refund(self, cost):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+class FairScheduler:
+    """Membatasi jumlah perintah berat yang berjalan bersamaan dan membagi slot secara round-robin antar pengguna.
+
+    Owner/admin tidak terkena token bucket dan antreannya dilayani lebih dulu. Jika antrean terlalu panjang,
+    permintaan baru ditolak dengan perkiraan waktu tunggu (load shedding).
+    """
+
+    def __init__(self, max_concurrent, max_queue, max_queue_per_user, rate_per_minute, burst, default_duration):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.refill_rate = rate_per_minute / 60
+        self.burst = burst
+        # Bucket pengguna yang lama tidak aktif pasti sudah penuh lagi, jadi aman dibuang dari memori
+        self.buckets = TTLCache(10000, burst / self.refill_rate)
+        self.queues = {} # user_id -> deque future yang menunggu slot
+        self.rotation = deque() # Giliran round-robin pengguna biasa
+        self.priority_rotation = deque() # Giliran owner/admin, dilayani lebih dulu
+        self.running = 0
+        self.avg_duration = default_duration # EWMA lama eksekusi satu perintah (detik)
+        self.stats = {"admitted": 0, "rate_limited": 0, "shed": 0}
+
+    @property
+    def queued(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def estimate_wait(self, extra=1):
+        """Perkiraan waktu tunggu (detik) untuk permintaan yang masuk di belakang antrean saat ini."""
+        slots_ahead = self.running + self.queued + extra - self.max_concurrent
+        if slots_ahead <= 0:
+            return 0
+        return math.ceil(slots_ahead / self.max_concurrent) * self.avg_duration
+
+    def admit(self, user_id, cost):
+        """Mengecek token bucket dan kedalaman antrean. Mengembalikan None jika diterima,
+        atau tuple (alasan, detik_tunggu) jika ditolak."""
+        if self.queued >= self.max_queue or len(self.queues.get(user_id, ())) >= self.max_queue_per_user:
+            self.stats["shed"] += 1
+            return "overloaded", self.estimate_wait()
+        bucket = self.buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, self.refill_rate)
+        self.buckets.set(user_id, bucket)
+        wait = bucket.try_consume(cost)
+        if wait:
+            self.stats["rate_limited"] += 1
+            return ("over_capacity" if math.isinf(wait) else "rate_limited"), wait
+        self.stats["admitted"] += 1
+        return None
+
+    def refund(self, user_id, cost):
+        """Mengembalikan token yang sudah diambil untuk permintaan yang akhirnya tidak dikerjakan."""
+        bucket = self.buckets.get(user_id)
+        if bucket is not None:
+            bucket.refund(cost)
+
+    def must_wait(self):
+        return self.running >= self.max_concurrent or bool(self.queues)
+
+    async def acquire(self, user_id, priority=False):
+        """Menunggu slot eksekusi sesuai giliran round-robin."""
+        if not self.must_wait():
+            self.running += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        queue = self.queues.get(user_id)
+        if queue is None:
+            queue = self.queues[user_id] = deque()
+            (self.priority_rotation if priority else self.rotation).append(user_id)
+        queue.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release() # Slot sudah diberikan tepat sebelum dibatalkan
+            else:
+                self._remove(user_id, future)
+            raise
+
+    def _remove(self, user_id, future):
+        queue = self.queues.get(user_id)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        if not queue:
+            del self.queues[user_id]
+            for rotation in (self.priority_rotation, self.rotation):
+                if user_id in rotation:
+                    rotation.remove(user_id)
+
+    def release(self, duration=None):
+        self.running -= 1
+        if duration is not None:
+            self.avg_duration = 0.8 * self.avg_duration + 0.2 * duration
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.running < self.max_concurrent:
+            rotation = self.priority_rotation or self.rotation
+            if not rotation:
+                return
+            user_id = rotation.popleft()
+            queue = self.queues[user_id]
+            future = queue.popleft()
+            if queue:
+                rotation.append(user_id) # Pengguna kembali ke belakang giliran
+            else:
+                del self.queues[user_id]
+            if not future.done():
+                self.running += 1
+                future.set_result(None)
+
+fair_scheduler = FairScheduler(
+    SCHEDULER_MAX_CONCURRENT, SCHEDULER_MAX_QUEUE, SCHEDULER_MAX_QUEUE_PER_USER,
+    USER_RATE_PER_MINUTE, USER_RATE_BURST, SCHEDULER_DEFAULT_DURATION
+)
+
+@metrics.register_collector
+def _scheduler_metrics():
+    samples = [
+        ("bot_scheduler_running", "gauge", {}, fair_scheduler.running),
+        ("bot_scheduler_queued", "gauge", {}, fair_scheduler.queued),
+    ]
+    samples += [(f"bot_scheduler_{name}_total", "counter", {}, value) for name, value in fair_scheduler.stats.items()]
+    return samples
+_scheduled_tasks = set()
+
+def fair_scheduled(command):
+    """Decorator untuk handler perintah berat: token bucket per pengguna (biaya COMMAND_COSTS[command]),
+    antrean round-robin antar pengguna, dan penolakan dengan perkiraan waktu saat antrean penuh.
+
+    Handler dijalankan sebagai task terpisah agar worker Pyrogram tidak tertahan selama menunggu giliran;
+    wrapper mengembalikan task tersebut (None jika permintaan ditolak) agar pemanggil bisa menunggu hasilnya.
+    """
+    cost = COMMAND_COSTS.get(command, 1)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(client, message):
+            if len(message.command) < 2:
+                await func(client, message) # Hanya pesan petunjuk penggunaan, tidak perlu dijadwalkan
+                return
+
+            user_id = message.from_user.id
+            privileged = is_owner_or_admin(user_id)
+            if not privileged:
+                rejected = fair_scheduler.admit(user_id, cost)
+                if rejected:
+                    reason, wait = rejected
+                    if reason == "rate_limited":
+                        await message.reply_text(f"🚫 Terlalu banyak permintaan. Silakan coba `/{command}` lagi dalam {math.ceil(wait)} detik.")
+                    elif reason == "over_capacity":
+                        await message.reply_text(f"🚫 Biaya `/{command}` melebihi kuota maksimal per pengguna. Hubungi admin bot.")
+                    else:
+                        await message.reply_text(
+                            f"🚫 Bot sedang sibuk ({fair_scheduler.queued} permintaan dalam antrean).\n"
+                            f"Perkiraan waktu tunggu ~{math.ceil(wait)} detik. Silakan coba lagi nanti."
+                        )
+                    logger.info(f"Perintah /{command} dari user {user_id} ditolak scheduler: {reason}")
+                    return
+
+            if fair_scheduler.must_wait():
+                await message.reply_text(f"⏳ Permintaan Anda masuk antrean. Perkiraan waktu tunggu ~{math.ceil(fair_scheduler.estimate_wait())} detik.")
+
+            async def run():
+                queued_at = time.monotonic()
+                try:
+                    await fair_scheduler.acquire(user_id, priority=privileged)
+                except asyncio.CancelledError:
+                    return
+                started = time.monotonic()
+                metrics.observe("bot_scheduler_wait_seconds", started - queued_at, command=command)
+                try:
+                    with stall_detector.running(func.__name__):
+                        async with metrics.track("bot_handler", handler=func.__name__):
+                            await func(client, message)
+                except Exception as e:
+                    logger.error(f"Error tak tertangani pada /{command} untuk user {user_id}: {e}")
+                finally:
+                    fair_scheduler.release(time.monotonic() - started)
+
+            task = asyncio.create_task(run())
+            _scheduled_tasks.add(task)
+            task.add_done_callback(_scheduled_tasks.discard)
+            return task
+        wrapper.instrumented = True
+        return wrapper
+    return decorator
+
+# --- Client HTTP BotAcax ---
+
+class BotAcaxError(Exception):
+    """Dilempar saat request ke BotAcax gagal setelah semua percobaan ulang."""
+
+class CircuitOpen(BotAcaxError):
+    """Dilempar saat circuit breaker terbuka sehingga request langsung ditolak tanpa menghubungi server."""
+
+class CircuitBreaker:
+    """Circuit breaker: closed -> open setelah beberapa kegagalan beruntun -> half-open setelah cooldown.
+
+    Saat half-open hanya satu request percobaan yang diizinkan; jika berhasil circuit kembali closed.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+
+    def allow(self):
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self.probe_in_flight = False
+        if self.state == "half_open":
+            # Probe yang tidak pernah selesai (mis. task-nya hilang) dianggap basi setelah reset_timeout
+            if self.probe_in_flight and now - self.probe_started < self.reset_timeout:
+                return False
+            self.probe_in_flight = True
+            self.probe_started = now
+        return True
+
+    def release_probe(self):
+        """Melepas probe half-open yang berakhir tanpa hasil (dibatalkan atau error di luar kegagalan server)."""
+        if self.state == "half_open":
+            self.probe_in_flight = False
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info(f"Circuit {self.name} kembali closed.")
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit {self.name} terbuka setelah {self.failures} kegagalan; request ditolak selama {self.reset_timeout} detik.")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+class BotAcaxClient:
+    """Client HTTP async bersama untuk semua endpoint BotAcax.
+
+    Memakai koneksi keep-alive (connection pool aiohttp), membatasi request bersamaan, mengulang
+    request yang gagal karena 5xx/429/timeout dengan exponential backoff + jitter, dan memakai
+    circuit breaker agar gagal cepat saat BotAcax sedang down. `base_url` bisa diarahkan ke
+    stub server lokal untuk pengujian.
+    """
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url, api_key, max_concurrency, max_retries, timeout, backoff_base, backoff_max, breaker):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def request(self, method, endpoint, timeout=None, **kwargs):
+        """Mengirim request dan mengembalikan body JSON. `endpoint` boleh relatif terhadap base_url."""
+        if not self.breaker.allow():
+            raise CircuitOpen(f"BotAcax sedang tidak tersedia (circuit {self.breaker.state}).")
+
+        probe = self.breaker.state == "half_open" # Request ini adalah satu-satunya probe half-open
+        try:
+            url = urljoin(self.base_url, endpoint)
+            op = f"{method} {urlsplit(url).path}"
+            request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+            last_error = None
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with self.semaphore, track_backend("botacax", op):
+                        async with self._get_session().request(method, url, timeout=request_timeout, **kwargs) as response:
+                            if response.status in self.RETRYABLE_STATUS:
+                                raise BotAcaxError(f"HTTP {response.status} dari {url}")
+                            if response.status >= 400:
+                                # Error 4xx berarti request-nya yang salah, bukan server down: jangan diulang
+                                self.breaker.record_success()
+                                response.raise_for_status()
+                            record_bytes("botacax", "in", len(await response.read()))
+                            data = await response.json(content_type=None)
+                    self.breaker.record_success()
+                    return data
+                except (BotAcaxError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                    last_error = e
+                    if attempt < self.max_retries:
+                        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)) # Full jitter
+                        logger.warning(f"Request BotAcax gagal ({e!r}), percobaan ulang {attempt + 1}/{self.max_retries} dalam {delay:.1f} detik.")
+                        await asyncio.sleep(delay)
+            self.breaker.record_failure()
+            raise BotAcaxError(f"Request ke {url} gagal setelah {self.max_retries + 1} percobaan: {last_error!r}")
+        finally:
+            if probe:
+                self.breaker.release_probe()
+
+    async def get(self, endpoint, **kwargs):
+        return await self.request("GET", endpoint, **kwargs)
+
+    async def post(self, endpoint, **kwargs):
+        return await self.request("POST", endpoint, **kwargs)
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+botacax_client = BotAcaxClient(
+    BOTACAX_BASE_URL, BOTACAX_API_KEY,
+    max_concurrency=BOTACAX_MAX_CONCURRENCY,
+    max_retries=BOTACAX_MAX_RETRIES,
+    timeout=BOTACAX_TIMEOUT,
+    backoff_base=BOTACAX_BACKOFF_BASE,
+    backoff_max=BOTACAX_BACKOFF_MAX,
+    breaker=CircuitBreaker("botacax", BOTACAX_BREAKER_THRESHOLD, BOTACAX_BREAKER_RESET),
+)
+
+# --- Pesan Status ---
+
+def format_bytes(size):
+    """Mengubah jumlah byte menjadi teks yang mudah dibaca (KB, MB, GB)."""
+    if not size:
+        return "?"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+async def safe_edit(status_message, text, final=False):
+    """Mengedit pesan status tanpa menggagalkan proses jika edit ditolak Telegram.
+
+    Update progres boleh dilewati saat chat sedang dibatasi; pesan akhir (`final=True`) menunggu gilirannya.
+    """
+    try:
+        with contextlib.nullcontext() if final else droppable_outbound():
+            await status_message.edit_text(text)
+    except MessageNotModified:
+        pass
+    except FloodWait as e:
+        logger.warning(f"FloodWait {e.value} detik saat mengedit pesan status, update dilewati.")
+    except Exception as e:
+        logger.debug(f"Gagal mengedit pesan status: {e}")
+
+async def finish_status(message, status_message, text, **kwargs):
+    """Menampilkan hasil akhir dengan mengedit pesan status (jika ada); jika edit gagal, hasil dikirim sebagai balasan baru."""
+    if status_message is not None:
+        try:
+            return await status_message.edit_text(text, **kwargs)
+        except MessageNotModified:
+            return status_message
+        except BadRequest as e:
+            logger.debug(f"Gagal mengedit pesan status, hasil dikirim sebagai pesan baru: {e}")
+    return await message.reply_text(text, **kwargs)
+
+# --- Siklus Hidup Modul Fitur ---
+
+startup_hooks = []
+shutdown_hooks = []
+background_tasks = set()
+
+def on_startup(func):
+    """Mendaftarkan coroutine yang dijalankan setelah bot terhubung ke Telegram."""
+    startup_hooks.append(func)
+    return func
+
+def on_shutdown(func):
+    """Mendaftarkan coroutine yang dijalankan sebelum bot berhenti."""
+    shutdown_hooks.append(func)
+    return func
+
+def start_background(coro):
+    """Menjalankan pekerjaan latar belakang yang otomatis dibatalkan saat bot berhenti."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def run_startup_hooks():
+    """Menjalankan hook startup semua modul fitur; hook yang gagal hanya membuat fiturnya terbatas."""
+    for hook in startup_hooks:
+        try:
+            await hook()
+        except Exception as e:
+            logger.error(f"Startup {hook.__module__}.{hook.__name__} gagal, fitur terkait berjalan terbatas: {e}")
+
+async def run_shutdown_hooks():
+    """Membatalkan pekerjaan latar belakang, menjalankan hook shutdown dan menutup koneksi HTTP bersama."""
+    stall_detector.stop()
+    for task in list(background_tasks):
+        task.cancel()
+    for hook in shutdown_hooks:
+        try:
+            await hook()
+        except Exception as e:
+            logger.error(f"Shutdown {hook.__module__}.{hook.__name__} gagal: {e}")
+    await close_http_session()
+    await botacax_client.close()
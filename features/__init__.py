@@ -0,0 +1,2 @@
+# features/
+# Modul fitur bot. Setiap modul mendaftarkan handler-nya ke core.bot saat di-import oleh main.py.
@@ -0,0 +1,605 @@
+# features/ai.py
+# Fitur AI: /ask (router OpenAI/Gemini), /ask_openai, /ask_gemini dan cache jawaban.
+
+import logging
+import asyncio
+import contextlib
+import time
+import hashlib
+import re
+import math
+from datetime import timedelta
+from collections import deque
+from pyrogram import filters
+from pyrogram.errors import FloodWait, MessageNotModified
+
+from config import (
+    OPENAI_API_KEY, GEMINI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL, GEMINI_MODEL, OPENAI_MAX_CONCURRENT,
+    GEMINI_MAX_CONCURRENT, AI_MAX_QUEUE, AI_REQUEST_TIMEOUT, AI_STREAMING, AI_STREAM_EDIT_INTERVAL, AI_STREAM_MIN_CHARS,
+    AI_STREAM_PAGE_SIZE, AI_CACHE_ENABLED, AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL, AI_ROUTER_EWMA_ALPHA,
+    AI_ROUTER_ERROR_PENALTY, AI_ROUTER_LATENCY_WINDOW, AI_ROUTER_HEDGE_PERCENTILE, AI_ROUTER_HEDGE_MIN_DELAY,
+    AI_ROUTER_HEDGE_MAX_DELAY, AI_ROUTER_DEFAULT_HEDGE_DELAY, AI_ROUTER_FAILURE_THRESHOLD,
+    AI_ROUTER_COOLDOWN
+)
+from core import (
+    LazyCollection, TTLCache, bot, droppable_outbound, fair_scheduled, finish_status, metrics, on_startup,
+    owner_or_admin_only, record_bytes, register_index, run_sync, start_background, track_backend, utc_now
+)
+
+logger = logging.getLogger(__name__)
+
+ai_cache_collection = LazyCollection("ai_response_cache")
+register_index(ai_cache_collection, "expires_at", expireAfterSeconds=0) # Dokumen kadaluarsa dihapus otomatis oleh MongoDB
+
+# --- Client API AI (dibuat saat pertama kali dipakai) ---
+
+_openai_client = None
+_gemini_model = None
+
+def get_openai_client():
+    """Client AsyncOpenAI; SDK openai baru di-import saat request pertama."""
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI
+        _openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, timeout=AI_REQUEST_TIMEOUT)
+        logger.info("OpenAI client diinisialisasi.")
+    return _openai_client
+
+def get_gemini_model():
+    """Model Gemini; SDK google-generativeai baru di-import saat request pertama."""
+    global _gemini_model
+    if _gemini_model is None:
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        _gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+        logger.info("Gemini model diinisialisasi.")
+    return _gemini_model
+
+if not OPENAI_API_KEY:
+    logger.warning("OPENAI_API_KEY tidak ditemukan. Fitur OpenAI tidak akan berfungsi.")
+if not GEMINI_API_KEY:
+    logger.warning("GEMINI_API_KEY tidak ditemukan. Fitur Gemini tidak akan berfungsi.")
+
+@on_startup
+async def prewarm_ai_clients():
+    """Menyiapkan client AI di latar belakang setelah bot siap agar request pertama tidak menanggung biaya import."""
+    async def prewarm():
+        for enabled, factory in ((OPENAI_API_KEY, get_openai_client), (GEMINI_API_KEY, get_gemini_model)):
+            if enabled:
+                try:
+                    await run_sync(factory)
+                except Exception as e:
+                    logger.error(f"Gagal menyiapkan client AI ({factory.__name__}): {e}")
+    start_background(prewarm())
+
+# --- Pembatas Concurrency Provider AI ---
+
+class AIQueueFull(Exception):
+    """Dilempar saat antrean tunggu provider AI sudah penuh."""
+
+class ProviderLimiter:
+    """Membatasi jumlah request paralel dan panjang antrean tunggu untuk satu provider AI."""
+
+    def __init__(self, name, max_concurrent, max_queue):
+        self.name = name
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self.semaphore.locked() and self.waiting >= self.max_queue:
+            raise AIQueueFull(f"Antrean {self.name} penuh ({self.waiting} request menunggu).")
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+ai_limiters = {
+    "openai": ProviderLimiter("openai", OPENAI_MAX_CONCURRENT, AI_MAX_QUEUE),
+    "gemini": ProviderLimiter("gemini", GEMINI_MAX_CONCURRENT, AI_MAX_QUEUE),
+}
+
+@metrics.register_collector
+def _ai_limiter_metrics():
+    return [("bot_ai_queue_waiting", "gauge", {"provider": name}, limiter.waiting) for name, limiter in ai_limiters.items()]
+
+async def ask_openai(prompt):
+    """Mengirim prompt ke OpenAI secara async dan mengembalikan teks jawaban."""
+    async with ai_limiters["openai"].slot(), track_backend("openai", "chat"):
+        response = await asyncio.wait_for(
+            get_openai_client().chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=500
+            ),
+            timeout=AI_REQUEST_TIMEOUT
+        )
+    answer = response.choices[0].message.content
+    record_bytes("openai", "in", len((answer or "").encode()))
+    return answer
+
+async def ask_gemini(prompt):
+    """Mengirim prompt ke Gemini secara async dan mengembalikan teks jawaban."""
+    async with ai_limiters["gemini"].slot(), track_backend("gemini", "generate"):
+        response = await asyncio.wait_for(
+            get_gemini_model().generate_content_async(prompt),
+            timeout=AI_REQUEST_TIMEOUT
+        )
+        answer = response.text
+    record_bytes("gemini", "in", len(answer.encode()))
+    return answer
+
+async def _iter_with_timeout(aiterable, timeout):
+    """Meneruskan item dari async iterator, gagal jika jeda antar item melebihi timeout."""
+    iterator = aiterable.__aiter__()
+    while True:
+        try:
+            item = await asyncio.wait_for(iterator.__anext__(), timeout=timeout)
+        except StopAsyncIteration:
+            return
+        yield item
+
+async def stream_openai(prompt):
+    """Mengirim prompt ke OpenAI dalam mode streaming dan menghasilkan potongan teks jawaban."""
+    async with ai_limiters["openai"].slot(), track_backend("openai", "chat_stream"):
+        stream = await asyncio.wait_for(
+            get_openai_client().chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=500,
+                stream=True
+            ),
+            timeout=AI_REQUEST_TIMEOUT
+        )
+        async with contextlib.aclosing(_iter_with_timeout(stream, AI_REQUEST_TIMEOUT)) as chunks:
+            async for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    record_bytes("openai", "in", len(chunk.choices[0].delta.content.encode()))
+                    yield chunk.choices[0].delta.content
+
+async def stream_gemini(prompt):
+    """Mengirim prompt ke Gemini dalam mode streaming dan menghasilkan potongan teks jawaban."""
+    async with ai_limiters["gemini"].slot(), track_backend("gemini", "generate_stream"):
+        response = await asyncio.wait_for(
+            get_gemini_model().generate_content_async(prompt, stream=True),
+            timeout=AI_REQUEST_TIMEOUT
+        )
+        async with contextlib.aclosing(_iter_with_timeout(response, AI_REQUEST_TIMEOUT)) as chunks:
+            async for chunk in chunks:
+                if chunk.text:
+                    record_bytes("gemini", "in", len(chunk.text.encode()))
+                    yield chunk.text
+
+class StreamingReply:
+    """Menampilkan jawaban secara bertahap dengan mengedit pesan status.
+
+    Edit digabung berdasarkan jeda waktu (AI_STREAM_EDIT_INTERVAL) dan jumlah karakter baru
+    (AI_STREAM_MIN_CHARS) agar tidak terkena FloodWait. Jawaban yang melebihi
+    AI_STREAM_PAGE_SIZE dilanjutkan ke pesan balasan berikutnya.
+    """
+
+    CURSOR = " ▌"
+
+    def __init__(self, message, status_message, header):
+        self.message = message
+        self.header = header
+        self.text = ""
+        self.messages = [status_message]
+        self.shown = [status_message.text]
+        self.pending_chars = 0
+        self.last_edit = 0.0
+        self.blocked_until = 0.0
+
+    def _pages(self):
+        first_size = AI_STREAM_PAGE_SIZE - len(self.header)
+        pages = [self.header + self.text[:first_size]]
+        rest = self.text[first_size:]
+        while rest:
+            pages.append(rest[:AI_STREAM_PAGE_SIZE])
+            rest = rest[AI_STREAM_PAGE_SIZE:]
+        return pages
+
+    async def feed(self, chunk):
+        self.text += chunk
+        self.pending_chars += len(chunk)
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return
+        if now - self.last_edit >= AI_STREAM_EDIT_INTERVAL and self.pending_chars >= AI_STREAM_MIN_CHARS:
+            with droppable_outbound():
+                await self._flush(final=False)
+
+    async def finish(self):
+        delay = self.blocked_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._flush(final=True)
+
+    async def _flush(self, final):
+        pages = self._pages()
+        for index, page in enumerate(pages):
+            is_last = index == len(pages) - 1
+            if is_last and not final:
+                page += self.CURSOR
+            try:
+                if index >= len(self.messages):
+                    sent = await self.message.reply_text(page)
+                    self.messages.append(sent)
+                    self.shown.append(page)
+                elif page != self.shown[index]:
+                    await self.messages[index].edit_text(page)
+                    self.shown[index] = page
+            except MessageNotModified:
+                self.shown[index] = page
+            except FloodWait as e:
+                logger.warning(f"FloodWait {e.value} detik saat streaming jawaban ke chat {self.message.chat.id}.")
+                self.blocked_until = time.monotonic() + e.value
+                if not final:
+                    return
+                await asyncio.sleep(e.value)
+                return await self._flush(final=True)
+        self.pending_chars = 0
+        self.last_edit = time.monotonic()
+
+AI_PROVIDERS = {
+    "openai": {"label": "OpenAI", "model": OPENAI_MODEL, "ask": ask_openai, "stream": stream_openai},
+    "gemini": {"label": "Gemini AI", "model": GEMINI_MODEL, "ask": ask_gemini, "stream": stream_gemini},
+}
+
+def normalize_prompt(prompt):
+    """Menormalkan prompt (huruf kecil, spasi dirapikan) agar variasi penulisan kecil tetap cocok di cache."""
+    return re.sub(r"\s+", " ", prompt).strip().casefold()
+
+class AIResponseCache:
+    """Cache jawaban AI dua tingkat: LRU di memori + koleksi MongoDB yang bertahan saat restart."""
+
+    def __init__(self, collection, max_entries, ttl):
+        self.collection = collection
+        self.ttl = ttl
+        self.memory = TTLCache(max_entries, ttl)
+        self.stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "stores": 0, "invalidated": 0}
+
+    @staticmethod
+    def make_key(provider, model, prompt):
+        raw = f"{provider}|{model}|{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, provider, model, prompt):
+        key = self.make_key(provider, model, prompt)
+        answer = self.memory.get(key)
+        if answer is not None:
+            self.stats["memory_hits"] += 1
+            return answer
+        try:
+            doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": utc_now()}})
+        except Exception as e:
+            logger.warning(f"Gagal membaca cache AI dari MongoDB: {e}")
+            doc = None
+        if doc:
+            self.stats["mongo_hits"] += 1
+            remaining = (doc["expires_at"] - utc_now()).total_seconds()
+            self.memory.set(key, doc["answer"], ttl=max(remaining, 1))
+            return doc["answer"]
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, provider, model, prompt, answer):
+        key = self.make_key(provider, model, prompt)
+        self.memory.set(key, answer)
+        self.stats["stores"] += 1
+        doc = {
+            "provider": provider,
+            "model": model,
+            "prompt": normalize_prompt(prompt),
+            "answer": answer,
+            "created_at": utc_now(),
+            "expires_at": utc_now() + timedelta(seconds=self.ttl),
+        }
+        try:
+            await self.collection.update_one({"_id": key}, {"$set": doc}, upsert=True)
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan cache AI ke MongoDB: {e}")
+
+    async def invalidate(self, provider=None, prompt=None):
+        """Menghapus entri cache. Tanpa argumen seluruh cache dihapus."""
+        query = {}
+        if provider:
+            query["provider"] = provider
+        if prompt:
+            query["prompt"] = normalize_prompt(prompt)
+        if prompt:
+            for name in ([provider] if provider else AI_PROVIDERS):
+                self.memory.pop(self.make_key(name, AI_PROVIDERS[name]["model"], prompt))
+        else:
+            # Key di memori berupa hash, jadi entri per provider tidak bisa dipilah; kosongkan seluruhnya.
+            self.memory.clear()
+        result = await self.collection.delete_many(query)
+        self.stats["invalidated"] += result.deleted_count
+        return result.deleted_count
+
+ai_cache = AIResponseCache(ai_cache_collection, AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL)
+
+# --- Router Provider AI ---
+
+class AIProvidersUnavailable(Exception):
+    """Dilempar saat tidak ada provider AI yang berhasil menjawab."""
+
+class ProviderHealth:
+    """Mencatat latensi (EWMA) dan tingkat error satu provider AI untuk keperluan routing."""
+
+    def __init__(self, name):
+        self.name = name
+        self.ewma_latency = None
+        self.error_rate = 0.0
+        self.latencies = deque(maxlen=AI_ROUTER_LATENCY_WINDOW)
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+    def record_success(self, latency):
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = AI_ROUTER_EWMA_ALPHA * latency + (1 - AI_ROUTER_EWMA_ALPHA) * self.ewma_latency
+        self.error_rate = (1 - AI_ROUTER_EWMA_ALPHA) * self.error_rate
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+    def record_failure(self):
+        self.error_rate = AI_ROUTER_EWMA_ALPHA + (1 - AI_ROUTER_EWMA_ALPHA) * self.error_rate
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= AI_ROUTER_FAILURE_THRESHOLD:
+            self.down_until = time.monotonic() + AI_ROUTER_COOLDOWN
+            logger.warning(f"Provider {self.name} dianggap down selama {AI_ROUTER_COOLDOWN} detik setelah {self.consecutive_failures} kegagalan beruntun.")
+
+    def is_available(self):
+        return time.monotonic() >= self.down_until
+
+    def score(self):
+        """Semakin kecil semakin baik: latensi EWMA dikalikan penalti tingkat error."""
+        latency = self.ewma_latency if self.ewma_latency is not None else AI_ROUTER_DEFAULT_HEDGE_DELAY
+        return latency * (1 + AI_ROUTER_ERROR_PENALTY * self.error_rate)
+
+    def hedge_delay(self):
+        """Batas waktu sebelum request cadangan dikirim: persentil latensi terbaru provider ini."""
+        if len(self.latencies) < 5:
+            return AI_ROUTER_DEFAULT_HEDGE_DELAY
+        ordered = sorted(self.latencies)
+        index = max(math.ceil(AI_ROUTER_HEDGE_PERCENTILE / 100 * len(ordered)) - 1, 0)
+        return min(max(ordered[index], AI_ROUTER_HEDGE_MIN_DELAY), AI_ROUTER_HEDGE_MAX_DELAY)
+
+ai_health = {name: ProviderHealth(name) for name in AI_PROVIDERS}
+
+def rank_ai_providers():
+    """Mengurutkan provider yang aktif: yang sehat berdasarkan skor, yang sedang down di akhir."""
+    enabled = []
+    if OPENAI_API_KEY:
+        enabled.append("openai")
+    if GEMINI_API_KEY:
+        enabled.append("gemini")
+    return sorted(enabled, key=lambda name: (not ai_health[name].is_available(), ai_health[name].score()))
+
+async def timed_provider_ask(provider, prompt):
+    """Memanggil provider AI sambil mencatat latensi dan error-nya."""
+    started = time.monotonic()
+    try:
+        answer = await AI_PROVIDERS[provider]["ask"](prompt)
+    except (asyncio.CancelledError, AIQueueFull):
+        raise # Antrean lokal yang penuh bukan tanda provider bermasalah
+    except Exception:
+        ai_health[provider].record_failure()
+        raise
+    ai_health[provider].record_success(time.monotonic() - started)
+    return answer
+
+async def routed_ask(prompt):
+    """Meminta jawaban dari provider terbaik, dengan hedged request dan failover ke provider berikutnya.
+
+    Jika provider pertama belum menjawab dalam batas persentil latensinya, request yang sama
+    dikirim ke provider berikutnya dan jawaban tercepat yang dipakai. Jika provider gagal,
+    provider berikutnya langsung dicoba. Mengembalikan tuple (provider, jawaban).
+    """
+    queue = rank_ai_providers()
+    if not queue:
+        raise AIProvidersUnavailable("Tidak ada provider AI yang aktif.")
+
+    pending = {}
+    errors = {}
+
+    def launch():
+        provider = queue.pop(0)
+        pending[asyncio.create_task(timed_provider_ask(provider, prompt))] = provider
+        return provider
+
+    last_launched = launch()
+    try:
+        while pending:
+            hedge_delay = ai_health[last_launched].hedge_delay() if queue else None
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                last_launched = launch()
+                logger.info(f"Hedged request AI dikirim ke {last_launched} setelah {hedge_delay:.1f} detik.")
+                continue
+            for task in done:
+                provider = pending.pop(task)
+                if task.exception() is None:
+                    return provider, task.result()
+                errors[provider] = task.exception()
+                logger.warning(f"Provider {provider} gagal menjawab: {task.exception()}")
+            if queue and not pending:
+                last_launched = launch()
+                logger.info(f"Failover AI ke provider {last_launched}.")
+        raise AIProvidersUnavailable("; ".join(f"{name}: {error}" for name, error in errors.items()))
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def reply_ai_answer(message, provider, prompt):
+    """Meminta jawaban dari provider AI dan mengirimkannya ke user (streaming jika diaktifkan)."""
+    label = AI_PROVIDERS[provider]["label"]
+    model = AI_PROVIDERS[provider]["model"]
+    status_message = await message.reply_text(f"⏳ Sedang memproses pertanyaan Anda dengan {label}...")
+    header = f"**🤖 Jawaban dari {label}:**\n\n"
+
+    try:
+        cached_answer = await ai_cache.get(provider, model, prompt) if AI_CACHE_ENABLED else None
+        if cached_answer is not None:
+            reply = StreamingReply(message, status_message, header)
+            reply.text = cached_answer
+            await reply.finish()
+            logger.info(f"Jawaban {label} dari cache terkirim ke user {message.from_user.id}")
+            return
+
+        if AI_STREAMING:
+            reply = StreamingReply(message, status_message, header)
+            # aclosing: slot limiter provider langsung dilepas walau pembacaan stream berhenti di tengah
+            async with contextlib.aclosing(AI_PROVIDERS[provider]["stream"](prompt)) as chunks:
+                async for chunk in chunks:
+                    await reply.feed(chunk)
+            await reply.finish()
+            answer = reply.text
+        else:
+            answer = await AI_PROVIDERS[provider]["ask"](prompt)
+            reply = StreamingReply(message, status_message, header)
+            reply.text = answer
+            await reply.finish()
+        logger.info(f"Jawaban {label} terkirim ke user {message.from_user.id}")
+
+        if AI_CACHE_ENABLED and answer:
+            await ai_cache.set(provider, model, prompt, answer)
+    except AIQueueFull as e:
+        logger.warning(f"Request {label} ditolak: {e}")
+        await finish_status(message, status_message, f"⏳ Server {label} sedang sibuk melayani banyak pengguna. Silakan coba lagi sebentar lagi.")
+    except asyncio.TimeoutError:
+        logger.error(f"Request {label} melebihi batas waktu {AI_REQUEST_TIMEOUT} detik.")
+        await finish_status(message, status_message, f"❌ {label} tidak merespons tepat waktu. Silakan coba lagi.")
+    except Exception as e:
+        logger.error(f"Error saat memanggil {label} API: {e}")
+        await finish_status(message, status_message, f"Terjadi kesalahan saat memproses permintaan Anda dengan {label}: `{e}`")
+
+# --- Event Handlers ---
+
+@bot.on_message(filters.command("ask") & filters.private)
+@fair_scheduled("ask")
+async def ask_command(client, message):
+    if not OPENAI_API_KEY and not GEMINI_API_KEY:
+        await message.reply_text("❌ Fitur AI tidak diaktifkan atau API Key belum diatur.")
+        return
+
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **pertanyaan Anda**.\nContoh: `/ask Apa itu lubang hitam?`")
+        return
+
+    prompt = " ".join(message.command[1:])
+    status_message = await message.reply_text("⏳ Sedang memproses pertanyaan Anda...")
+    logger.info(f"User {message.from_user.id} meminta AI (router): {prompt[:50]}...")
+
+    try:
+        provider, answer = None, None
+        if AI_CACHE_ENABLED:
+            for name in rank_ai_providers():
+                answer = await ai_cache.get(name, AI_PROVIDERS[name]["model"], prompt)
+                if answer is not None:
+                    provider = name
+                    break
+        if answer is None:
+            provider, answer = await routed_ask(prompt)
+            if AI_CACHE_ENABLED and answer:
+                await ai_cache.set(provider, AI_PROVIDERS[provider]["model"], prompt, answer)
+
+        label = AI_PROVIDERS[provider]["label"]
+        reply = StreamingReply(message, status_message, f"**🤖 Jawaban dari {label}:**\n\n")
+        reply.text = answer
+        await reply.finish()
+        logger.info(f"Jawaban {label} (router) terkirim ke user {message.from_user.id}")
+    except AIProvidersUnavailable as e:
+        logger.error(f"Semua provider AI gagal: {e}")
+        await finish_status(message, status_message, "❌ Semua layanan AI sedang tidak dapat dihubungi. Silakan coba lagi nanti.")
+    except Exception as e:
+        logger.error(f"Error saat memproses /ask: {e}")
+        await finish_status(message, status_message, f"Terjadi kesalahan saat memproses permintaan Anda: `{e}`")
+
+@bot.on_message(filters.command("ask_openai") & filters.private)
+@fair_scheduled("ask_openai")
+async def ask_openai_command(client, message):
+    if not OPENAI_API_KEY:
+        await message.reply_text("❌ Fitur OpenAI tidak diaktifkan atau API Key belum diatur.")
+        return
+
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **pertanyaan Anda**.\nContoh: `/ask_openai Jelaskan tentang fusi nuklir.`")
+        return
+
+    prompt = " ".join(message.command[1:])
+    logger.info(f"User {message.from_user.id} meminta OpenAI: {prompt[:50]}...")
+    await reply_ai_answer(message, "openai", prompt)
+
+@bot.on_message(filters.command("ask_gemini") & filters.private)
+@fair_scheduled("ask_gemini")
+async def ask_gemini_command(client, message):
+    if not GEMINI_API_KEY:
+        await message.reply_text("❌ Fitur Gemini AI tidak diaktifkan atau API Key belum diatur.")
+        return
+
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **pertanyaan Anda**.\nContoh: `/ask_gemini Siapa penemu lampu?`")
+        return
+
+    prompt = " ".join(message.command[1:])
+    logger.info(f"User {message.from_user.id} meminta Gemini: {prompt[:50]}...")
+    await reply_ai_answer(message, "gemini", prompt)
+
+@bot.on_message(filters.command("ai_cache") & filters.private)
+@owner_or_admin_only
+async def ai_cache_stats_command(client, message):
+    stats = ai_cache.stats
+    lookups = stats["memory_hits"] + stats["mongo_hits"] + stats["misses"]
+    hit_ratio = (stats["memory_hits"] + stats["mongo_hits"]) / lookups * 100 if lookups else 0
+    await message.reply_text(
+        "**🗃️ Statistik Cache Jawaban AI:**\n"
+        f"  • **Status:** {'✅ Aktif' if AI_CACHE_ENABLED else '❌ Nonaktif'}\n"
+        f"  • **Entri di memori:** {len(ai_cache.memory)}/{AI_CACHE_MAX_ENTRIES}\n"
+        f"  • **Hit memori:** {stats['memory_hits']}\n"
+        f"  • **Hit MongoDB:** {stats['mongo_hits']}\n"
+        f"  • **Miss:** {stats['misses']}\n"
+        f"  • **Rasio hit:** {hit_ratio:.1f}%\n"
+        f"  • **Jawaban disimpan:** {stats['stores']}\n"
+        f"  • **Entri dihapus manual:** {stats['invalidated']}"
+    )
+
+@bot.on_message(filters.command("ai_cache_clear") & filters.private)
+@owner_or_admin_only
+async def ai_cache_clear_command(client, message):
+    args = message.command[1:]
+    provider = None
+    if args and args[0].lower() in AI_PROVIDERS:
+        provider = args[0].lower()
+        args = args[1:]
+    elif args and args[0].lower() == "all":
+        args = args[1:]
+    prompt = " ".join(args) or None
+
+    try:
+        deleted = await ai_cache.invalidate(provider=provider, prompt=prompt)
+    except Exception as e:
+        logger.error(f"Gagal menghapus cache AI: {e}")
+        await message.reply_text(f"Terjadi kesalahan saat menghapus cache AI: `{e}`")
+        return
+
+    logger.info(f"Owner/Admin {message.from_user.id} menghapus cache AI (provider={provider}, prompt={prompt!r}): {deleted} entri")
+    await message.reply_text(
+        f"✅ Cache AI dihapus ({deleted} entri di MongoDB).\n"
+        "Gunakan `/ai_cache_clear [openai|gemini|all] [prompt]` untuk menghapus entri tertentu."
+    )
@@ -0,0 +1,256 @@
+# features/checker.py
+# Pengecekan nomor, OTP dan A2F Telegram (/check_number, /check_otp, /check_a2f).
+
+import logging
+from datetime import datetime
+from pyrogram import Client, filters
+from pyrogram.errors import PhoneNumberInvalid, SessionPasswordNeeded, PhoneCodeExpired, PhoneCodeInvalid, PasswordHashInvalid
+
+from config import (
+    API_ID, API_HASH
+)
+from core import (
+    LazyCollection, bot, finish_status
+)
+
+logger = logging.getLogger(__name__)
+
+check_results_collection = LazyCollection("check_results")
+telegram_sessions_collection = LazyCollection("telegram_sessions") # Untuk potensi manajemen sesi di masa depan
+
+async def get_temp_user_client():
+    """Mendapatkan sesi Pyrogram sementara untuk pengecekan."""
+    try:
+        temp_client = Client(
+            "temp_checker",
+            api_id=API_ID,
+            api_hash=API_HASH,
+            in_memory=True # Tidak menyimpan sesi ke disk
+        )
+        await temp_client.start()
+        logger.info("Temporary user client started.")
+        return temp_client
+    except Exception as e:
+        logger.error(f"Gagal memulai temporary user client: {e}")
+        return None
+
+# --- Event Handlers ---
+
+@bot.on_message(filters.command("check_number") & filters.private)
+async def check_telegram_number(client, message):
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **nomor telepon**.\nContoh: `/check_number +6281234567890`")
+        return
+
+    phone_number = message.command[1].strip()
+    status_message = await message.reply_text(f"⏳ Sedang mengecek nomor: `{phone_number}`...")
+    logger.info(f"Mulai cek nomor untuk user {message.from_user.id}: {phone_number}")
+
+    user_client = None
+    try:
+        user_client = await get_temp_user_client()
+        if not user_client:
+            await finish_status(message, status_message, "Terjadi masalah saat menyiapkan sesi pengecekan. Coba lagi.")
+            return
+
+        sent_code = await user_client.send_code(phone_number)
+        phone_code_hash = sent_code.phone_code_hash
+
+        result_data = {
+            "user_id": message.from_user.id,
+            "type": "number_check",
+            "phone_number": phone_number,
+            "status": "Telegram User Found",
+            "phone_code_hash": phone_code_hash,
+            "timestamp": datetime.now()
+        }
+        await check_results_collection.insert_one(result_data)
+        logger.info(f"Nomor ditemukan: {phone_number}. Phone Code Hash disimpan.")
+        await finish_status(message, status_message,
+            f"✅ Nomor `{phone_number}` **terdaftar** di Telegram.\n"
+            "Kode OTP telah dikirimkan ke nomor tersebut.\n"
+            "Sekarang, Anda dapat mengecek OTP dengan perintah:\n"
+            "`/check_otp <kode_otp_yang_diterima>`"
+        )
+    except PhoneNumberInvalid:
+        result_data = {
+            "user_id": message.from_user.id,
+            "type": "number_check",
+            "phone_number": phone_number,
+            "status": "Phone Number Invalid (Not Registered)",
+            "timestamp": datetime.now()
+        }
+        await check_results_collection.insert_one(result_data)
+        logger.info(f"Nomor tidak terdaftar atau invalid: {phone_number}")
+        await finish_status(message, status_message,
+            f"❌ Nomor `{phone_number}` **tidak terdaftar** di Telegram, atau format tidak valid.\n"
+            "Pastikan Anda menyertakan kode negara (misal: `+628...`)."
+        )
+    except Exception as e:
+        logger.error(f"Error saat cek nomor {phone_number}: {e}")
+        await finish_status(message, status_message, f"Terjadi kesalahan saat mengecek nomor: `{e}`")
+    finally:
+        if user_client:
+            await user_client.stop()
+            logger.info("Temporary user client stopped.")
+
+@bot.on_message(filters.command("check_otp") & filters.private)
+async def check_telegram_otp(client, message):
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **kode OTP**.\nContoh: `/check_otp 12345`")
+        return
+
+    otp_code = message.command[1].strip()
+    status_message = await message.reply_text(f"⏳ Sedang mengecek OTP: `{otp_code}`...")
+    logger.info(f"Mulai cek OTP untuk user {message.from_user.id}: {otp_code}")
+
+    last_check = await check_results_collection.find_one(
+        {"user_id": message.from_user.id, "type": "number_check"},
+        sort=[("timestamp", -1)]
+    )
+
+    if not last_check or "phone_code_hash" not in last_check or "phone_number" not in last_check:
+        await finish_status(message, status_message,
+            "Anda perlu melakukan `/check_number` terlebih dahulu untuk mengirim OTP ke nomor target dan mendapatkan informasi yang diperlukan."
+        )
+        return
+
+    phone_number = last_check["phone_number"]
+    phone_code_hash = last_check["phone_code_hash"]
+
+    user_client = None
+    try:
+        user_client = await get_temp_user_client()
+        if not user_client:
+            await finish_status(message, status_message, "Terjadi masalah saat menyiapkan sesi pengecekan OTP. Coba lagi.")
+            return
+
+        await user_client.sign_in(phone_number, phone_code_hash, otp_code)
+
+        result_data = {
+            "user_id": message.from_user.id,
+            "type": "otp_check",
+            "phone_number": phone_number,
+            "otp_code": otp_code,
+            "status": "OTP Valid",
+            "timestamp": datetime.now()
+        }
+        await check_results_collection.insert_one(result_data)
+        logger.info(f"OTP valid untuk {phone_number}")
+        await finish_status(message, status_message,
+            f"✅ OTP `{otp_code}` **valid** untuk nomor `{phone_number}`.\n"
+            "Akun berhasil login!"
+        )
+    except PhoneCodeExpired:
+        result_data = {
+            "user_id": message.from_user.id,
+            "type": "otp_check",
+            "phone_number": phone_number,
+            "otp_code": otp_code,
+            "status": "OTP Expired",
+            "timestamp": datetime.now()
+        }
+        await check_results_collection.insert_one(result_data)
+        logger.warning(f"OTP kadaluarsa untuk {phone_number}")
+        await finish_status(message, status_message, "❌ Kode OTP sudah **kadaluarsa**.\nSilakan coba lagi dengan `/check_number`.")
+    except PhoneCodeInvalid:
+        result_data = {
+            "user_id": message.from_user.id,
+            "type": "otp_check",
+            "phone_number": phone_number,
+            "otp_code": otp_code,
+            "status": "OTP Invalid",
+            "timestamp": datetime.now()
+        }
+        await check_results_collection.insert_one(result_data)
+        logger.warning(f"OTP salah untuk {phone_number}")
+        await finish_status(message, status_message, "❌ Kode OTP **salah**.\nMohon masukkan kode yang benar.")
+    except SessionPasswordNeeded:
+        result_data = {
+            "user_id": message.from_user.id,
+            "type": "otp_check",
+            "phone_number": phone_number,
+            "otp_code": otp_code,
+            "status": "OTP Valid, A2F Needed",
+            "timestamp": datetime.now()
+        }
+        await check_results_collection.insert_one(result_data)
+        logger.info(f"OTP valid, A2F diperlukan untuk {phone_number}")
+        await finish_status(message, status_message,
+            f"✅ OTP `{otp_code}` **valid** tetapi akun `{phone_number}` memiliki **Two-Factor Authentication (A2F)**.\n"
+            "Sekarang Anda dapat mengecek A2F dengan perintah:\n"
+            "`/check_a2f <password_a2f>`"
+        )
+    except Exception as e:
+        logger.error(f"Error saat cek OTP {otp_code} untuk {phone_number}: {e}")
+        await finish_status(message, status_message, f"Terjadi kesalahan saat mengecek OTP: `{e}`")
+    finally:
+        if user_client:
+            await user_client.stop()
+            logger.info("Temporary user client stopped.")
+
+@bot.on_message(filters.command("check_a2f") & filters.private)
+async def check_telegram_a2f(client, message):
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **kata sandi A2F**.\nContoh: `/check_a2f YourSecretPassword123`")
+        return
+
+    a2f_password = message.command[1].strip()
+    status_message = await message.reply_text(f"⏳ Sedang mengecek A2F dengan sandi: `{a2f_password}`...")
+    logger.info(f"Mulai cek A2F untuk user {message.from_user.id}")
+
+    last_otp_check = await check_results_collection.find_one(
+        {"user_id": message.from_user.id, "type": "otp_check", "status": "OTP Valid, A2F Needed"},
+        sort=[("timestamp", -1)]
+    )
+
+    if not last_otp_check or "phone_number" not in last_otp_check:
+        await finish_status(message, status_message,
+            "Anda perlu menyelesaikan `/check_otp` yang mengindikasikan A2F diperlukan terlebih dahulu."
+        )
+        return
+
+    phone_number = last_otp_check["phone_number"]
+
+    user_client = None
+    try:
+        user_client = await get_temp_user_client()
+        if not user_client:
+            await finish_status(message, status_message, "Terjadi masalah saat menyiapkan sesi pengecekan A2F. Coba lagi.")
+            return
+
+        await user_client.check_password(a2f_password)
+
+        result_data = {
+            "user_id": message.from_user.id,
+            "type": "a2f_check",
+            "phone_number": phone_number,
+            "a2f_password": a2f_password,
+            "status": "A2F Valid (Login Successful)",
+            "timestamp": datetime.now()
+        }
+        await check_results_collection.insert_one(result_data)
+        logger.info(f"A2F valid untuk {phone_number}. Login berhasil.")
+        await finish_status(message, status_message,
+            f"✅ A2F `{a2f_password}` **valid** untuk nomor `{phone_number}`.\n"
+            "**Login ke akun berhasil!**"
+        )
+    except PasswordHashInvalid:
+        result_data = {
+            "user_id": message.from_user.id,
+            "type": "a2f_check",
+            "phone_number": phone_number,
+            "a2f_password": a2f_password,
+            "status": "A2F Invalid",
+            "timestamp": datetime.now()
+        }
+        await check_results_collection.insert_one(result_data)
+        logger.warning(f"A2F salah untuk {phone_number}")
+        await finish_status(message, status_message, "❌ Kata sandi A2F **salah**.\nMohon masukkan kata sandi yang benar.")
+    except Exception as e:
+        logger.error(f"Error saat cek A2F untuk {phone_number}: {e}")
+        await finish_status(message, status_message, f"Terjadi kesalahan saat mengecek A2F: `{e}`")
+    finally:
+        if user_client:
+            await user_client.stop()
+            logger.info("Temporary user client stopped.")
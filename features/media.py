@@ -0,0 +1,1715 @@
+# features/media.py
+# Fitur media YouTube (/song, /vsong, /cancel): antrean download, cache, scratch dan mode worker.
+
+import logging
+import os
+import io
+import asyncio
+import contextlib
+import time
+import hashlib
+import re
+import math
+import copy
+import shutil
+import socket
+import uuid
+import queue
+import threading
+import multiprocessing
+import importlib
+import aiohttp
+import concurrent.futures
+from datetime import timedelta
+from collections import deque, Counter
+from pyrogram import filters, idle
+from pyrogram.types import InputMediaAudio
+from pyrogram.errors import BadRequest
+
+from config import (
+    API_ID, API_HASH, BOT_TOKEN, DOWNLOAD_DIR, COOKIES_FILE, MEDIA_MAX_CONCURRENT_DOWNLOADS, MEDIA_MAX_QUEUE,
+    MEDIA_EXECUTOR, MEDIA_PROGRESS_INTERVAL, MEDIA_FILE_ID_CACHE_ENABLED, MEDIA_FILE_ID_TTL,
+    MEDIA_QUERY_CACHE_MAX_ENTRIES, MEDIA_QUERY_CACHE_TTL, MEDIA_INFO_CACHE_MAX_ENTRIES, MEDIA_INFO_CACHE_TTL,
+    MEDIA_PROBE_CONCURRENCY, AUDIO_PASSTHROUGH, AUDIO_PASSTHROUGH_EXTS, FFMPEG_MAX_WORKERS,
+    FFMPEG_AUDIO_BITRATE, VIDEO_MAX_BYTES, SCRATCH_QUOTA_BYTES, SCRATCH_ORPHAN_AGE, SCRATCH_SWEEP_INTERVAL,
+    MEDIA_MEMORY_THRESHOLD, MEDIA_HTTP_CHUNK_SIZE, THUMB_CACHE_MAX_BYTES, MEDIA_WORKER_CONCURRENCY,
+    MEDIA_JOB_LEASE, MEDIA_JOB_MAX_ATTEMPTS, MEDIA_JOB_RETRY_DELAY, MEDIA_JOB_POLL_INTERVAL,
+    MEDIA_JOB_RETENTION, SONG_BATCH_MAX_ITEMS, SONG_BATCH_CONCURRENCY, SONG_BATCH_DELIMITERS,
+    SONG_BATCH_ITEM_COST, SONG_BATCH_MAX_BUFFERED, COMMAND_COSTS
+)
+from core import (
+    FlightAborted, GovernedClient, LazyCollection, SingleFlight, TTLCache, bot, fair_scheduled,
+    fair_scheduler, finish_status, format_bytes, get_http_session, is_owner_or_admin, metrics, on_startup,
+    record_bytes, register_index, run_sync, safe_edit, start_background, track_backend, utc_now
+)
+import core # Untuk membaca core.bot_role yang ditetapkan main.py saat runtime
+
+logger = logging.getLogger(__name__)
+
+# Pastikan direktori download ada (struktur jobs/ dan objects/ dibuat oleh ScratchStore)
+os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+
+media_file_ids_collection = LazyCollection("media_file_ids")
+register_index(media_file_ids_collection, "last_used", expireAfterSeconds=MEDIA_FILE_ID_TTL) # file_id yang lama tidak dipakai dihapus
+media_jobs_collection = LazyCollection("media_jobs") # Antrean job media untuk mode dispatcher/worker
+register_index(media_jobs_collection, [("status", 1), ("created_at", 1)])
+register_index(media_jobs_collection, "expires_at", expireAfterSeconds=0) # Job selesai/dead dihapus setelah MEDIA_JOB_RETENTION
+
+@on_startup
+async def start_media_maintenance():
+    """Membersihkan sisa crash, menjalankan sweeper scratch dan menyiapkan yt-dlp di latar belakang.
+    Proses dispatcher tidak mengunduh media sehingga langkah ini dilewati."""
+    if core.bot_role != "all":
+        return
+    await run_sync(scratch_store.sweep) # Bersihkan sisa file dari crash sebelumnya
+    start_background(scratch_store.run_sweeper(SCRATCH_SWEEP_INTERVAL))
+    start_background(run_sync(importlib.import_module, "yt_dlp"))
+
+# --- Penyimpanan Sementara (Scratch) untuk DOWNLOAD_DIR ---
+
+class ScratchQuotaExceeded(Exception):
+    """Dilempar saat kuota disk DOWNLOAD_DIR tidak cukup untuk job baru."""
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            with contextlib.suppress(OSError):
+                total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+class ScratchStore:
+    """Penyimpanan file download di DOWNLOAD_DIR dengan kuota disk.
+
+    Setiap job mendapat folder kerja unik di `jobs/`. Hasil akhir dipindah ke `objects/<hash>/`
+    (content-addressed per video/mode/kualitas) dan dipakai ulang sampai tergusur kuota (LRU).
+    Sisa file dari crash (folder job yatim, `.part`, `.ytdl`, stream yang belum digabung)
+    dibersihkan saat startup dan secara berkala. Setiap job memesan perkiraan ukurannya saat dibuat
+    agar download yang berjalan bersamaan tidak melampaui kuota bersama-sama.
+    """
+
+    PARTIAL_FILE_PATTERN = re.compile(r"(\.part(-Frag\d+)?|\.ytdl|\.temp|\.f\d+\.\w+)$")
+    MEDIA_EXTENSIONS = (".mp3", ".m4a", ".mp4", ".webm", ".opus", ".ogg", ".mkv", ".jpg", ".webp")
+
+    def __init__(self, root, quota_bytes, orphan_age):
+        self.root = root
+        self.jobs_dir = os.path.join(root, "jobs")
+        self.objects_dir = os.path.join(root, "objects")
+        self.quota_bytes = quota_bytes
+        self.orphan_age = orphan_age
+        self.active_jobs = set()
+        self.reservations = {} # folder job -> perkiraan byte yang dipesan saat job dibuat
+        self.leases = Counter()
+        self.lock = threading.RLock() # Dipanggil dari banyak thread lewat run_sync
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    @staticmethod
+    def content_hash(key):
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+    def _object_dir(self, key):
+        return os.path.join(self.objects_dir, self.content_hash(key))
+
+    def new_job_dir(self, key, expected_bytes=0):
+        """Membuat folder kerja unik untuk satu job download dan memesan `expected_bytes` dari kuota.
+
+        Melempar ScratchQuotaExceeded jika kuota tidak cukup walau hasil lama sudah digusur.
+        """
+        with self.lock:
+            if not self.enforce_quota(expected_bytes):
+                raise ScratchQuotaExceeded()
+            path = os.path.join(self.jobs_dir, f"{self.content_hash(key)}-{uuid.uuid4().hex[:8]}")
+            os.makedirs(path)
+            self.active_jobs.add(path)
+            self.reservations[path] = expected_bytes
+        return path
+
+    def discard_job_dir(self, path):
+        with self.lock:
+            self.active_jobs.discard(path)
+            self.reservations.pop(path, None)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def lookup(self, key):
+        """Mengembalikan path file hasil yang tersimpan untuk `key`, atau None."""
+        object_dir = self._object_dir(key)
+        try:
+            names = [name for name in os.listdir(object_dir) if not self.PARTIAL_FILE_PATTERN.search(name)]
+        except FileNotFoundError:
+            return None
+        if not names:
+            return None
+        os.utime(object_dir) # Tandai baru dipakai untuk urutan LRU
+        return os.path.join(object_dir, names[0])
+
+    def commit(self, key, file_path):
+        """Memindahkan file hasil job ke penyimpanan content-addressed dan mengembalikan path barunya."""
+        object_dir = self._object_dir(key)
+        with self.lock:
+            os.makedirs(object_dir, exist_ok=True)
+            target = os.path.join(object_dir, os.path.basename(file_path))
+            if not self.leases.get(object_dir): # Versi lama yang sedang di-upload dibiarkan; digusur nanti oleh kuota
+                for name in os.listdir(object_dir):
+                    if os.path.join(object_dir, name) != target:
+                        with contextlib.suppress(OSError):
+                            os.remove(os.path.join(object_dir, name))
+            os.replace(file_path, target)
+            os.utime(object_dir)
+            self.reservations.pop(os.path.dirname(file_path), None) # File sudah tercatat di objects/
+        return target
+
+    @contextlib.contextmanager
+    def lease(self, file_path):
+        """Melindungi file dari penggusuran kuota selama masih dipakai (mis. saat upload)."""
+        directory = os.path.dirname(file_path)
+        self.leases[directory] += 1
+        try:
+            yield file_path
+        finally:
+            self.leases[directory] -= 1
+            if self.leases[directory] <= 0:
+                del self.leases[directory]
+
+    def usage(self):
+        return _dir_size(self.root)
+
+    def committed_usage(self):
+        """Pemakaian disk ditambah bagian reservasi job berjalan yang belum terisi file."""
+        usage = self.usage()
+        for path, reserved in self.reservations.items():
+            usage += max(0, reserved - _dir_size(path))
+        return usage
+
+    def enforce_quota(self, extra_bytes=0):
+        """Menggusur hasil lama (LRU) sampai pemakaian + reservasi + `extra_bytes` muat di kuota.
+
+        Mengembalikan False jika kuota tetap tidak cukup (semua sisa file sedang dipakai).
+        """
+        with self.lock:
+            return self._enforce_quota(extra_bytes)
+
+    def _enforce_quota(self, extra_bytes):
+        usage = self.committed_usage()
+        if usage + extra_bytes <= self.quota_bytes:
+            return True
+        objects = []
+        for name in os.listdir(self.objects_dir):
+            path = os.path.join(self.objects_dir, name)
+            with contextlib.suppress(OSError):
+                objects.append((os.path.getmtime(path), path))
+        for _, path in sorted(objects):
+            if self.leases.get(path):
+                continue
+            size = _dir_size(path)
+            shutil.rmtree(path, ignore_errors=True)
+            usage -= size
+            logger.info(f"Scratch: {path} digusur untuk kuota ({format_bytes(size)} dibebaskan).")
+            if usage + extra_bytes <= self.quota_bytes:
+                return True
+        logger.warning(f"Scratch: kuota {format_bytes(self.quota_bytes)} tidak cukup (terpakai {format_bytes(usage)}, butuh {format_bytes(extra_bytes)}).")
+        return False
+
+    def sweep(self):
+        """Menghapus folder job yatim dan file parsial sisa crash."""
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.jobs_dir):
+            path = os.path.join(self.jobs_dir, name)
+            if path in self.active_jobs:
+                continue
+            with contextlib.suppress(OSError):
+                if now - os.path.getmtime(path) > self.orphan_age:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+        # File langsung di root berasal dari versi lama (folder datar) atau crash
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not os.path.isfile(path):
+                continue
+            with contextlib.suppress(OSError):
+                is_stale_media = name.lower().endswith(self.MEDIA_EXTENSIONS) and now - os.path.getmtime(path) > self.orphan_age
+                if self.PARTIAL_FILE_PATTERN.search(name) or is_stale_media:
+                    os.remove(path)
+                    removed += 1
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for file_name in filenames:
+                if self.PARTIAL_FILE_PATTERN.search(file_name):
+                    with contextlib.suppress(OSError):
+                        os.remove(os.path.join(dirpath, file_name))
+                        removed += 1
+        if removed:
+            logger.info(f"Scratch: {removed} file/folder sisa dibersihkan.")
+        return removed
+
+    async def run_sweeper(self, interval):
+        """Loop latar belakang: sapu file yatim dan tegakkan kuota secara berkala."""
+        while True:
+            try:
+                await run_sync(self.sweep)
+                await run_sync(self.enforce_quota)
+            except Exception as e:
+                logger.warning(f"Scratch sweeper gagal: {e}")
+            await asyncio.sleep(interval)
+
+scratch_store = ScratchStore(DOWNLOAD_DIR, SCRATCH_QUOTA_BYTES, SCRATCH_ORPHAN_AGE)
+
+# --- Cache Thumbnail ---
+
+TELEGRAM_THUMB_MAX_SIDE = 320 # Batas Telegram: JPEG maksimal 320x320 dan < 200 KB
+
+def select_thumbnail_url(source):
+    """Memilih thumbnail terkecil yang sisi terpanjangnya masih >= 320px (cukup untuk Telegram)."""
+    thumbnails = [t for t in source.get("thumbnails") or [] if t.get("url")]
+    sized = [t for t in thumbnails if t.get("width") and t.get("height")]
+    if sized:
+        adequate = [t for t in sized if max(t["width"], t["height"]) >= TELEGRAM_THUMB_MAX_SIDE]
+        if adequate:
+            # Utamakan JPEG karena tidak perlu decode WebP
+            return min(adequate, key=lambda t: (t["width"] * t["height"], not t["url"].split("?")[0].endswith(".jpg")))["url"]
+        return max(sized, key=lambda t: t["width"] * t["height"])["url"]
+    if thumbnails:
+        return thumbnails[-1]["url"]
+    return source.get("thumbnail") or source.get("thumbnail_url")
+
+def _resize_thumbnail_sync(data, target_path):
+    """Mengecilkan gambar ke maksimal 320px dan menyimpannya sebagai JPEG.
+
+    Ditulis ke file sementara lalu di-rename agar pembaca tidak pernah melihat file yang setengah jadi.
+    """
+    try:
+        from PIL import Image # Opsional: untuk mengecilkan thumbnail
+    except ImportError:
+        Image = None
+    temp_path = f"{target_path}.{uuid.uuid4().hex[:8]}.temp"
+    try:
+        if Image is None:
+            # Tanpa Pillow gambar hanya bisa dipakai apa adanya jika sudah JPEG kecil
+            if data[:3] != b"\xff\xd8\xff" or len(data) > 200 * 1024:
+                return None
+            with open(temp_path, "wb") as f:
+                f.write(data)
+        else:
+            with Image.open(io.BytesIO(data)) as image:
+                image = image.convert("RGB")
+                image.thumbnail((TELEGRAM_THUMB_MAX_SIDE, TELEGRAM_THUMB_MAX_SIDE))
+                image.save(temp_path, "JPEG", quality=85, optimize=True)
+        os.replace(temp_path, target_path)
+        return target_path
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+
+class ThumbnailCache:
+    """Cache thumbnail lokal per ID video di disk, dengan batas ukuran total (file lama digusur)."""
+
+    RECENT_USE_WINDOW = 10 * 60 # Thumbnail yang dipakai dalam rentang ini (detik) mungkin sedang di-upload; tidak digusur
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flights = SingleFlight()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, video_id):
+        return os.path.join(self.directory, f"{re.sub(r'[^A-Za-z0-9_-]', '_', video_id)}.jpg")
+
+    def _lookup(self, video_id):
+        path = self._path(video_id)
+        if os.path.exists(path):
+            os.utime(path) # Tandai baru dipakai untuk urutan penggusuran
+            return path
+        return None
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            with contextlib.suppress(OSError):
+                entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+        total = sum(size for _, size, _ in entries)
+        recent = time.time() - self.RECENT_USE_WINDOW
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes or mtime >= recent:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+                total -= size
+
+    async def _fetch(self, video_id, url):
+        session = await get_http_session()
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+            response.raise_for_status()
+            data = await response.read()
+        path = await run_sync(_resize_thumbnail_sync, data, self._path(video_id))
+        await run_sync(self._evict)
+        return path
+
+    async def get(self, video_id, source):
+        """Mengembalikan path JPEG lokal untuk thumbnail video, atau None jika tidak tersedia."""
+        if not video_id or not source:
+            return None
+        path = await run_sync(self._lookup, video_id)
+        if path:
+            return path
+        url = select_thumbnail_url(source)
+        if not url:
+            return None
+        try:
+            path, _ = await self.flights.run(video_id, lambda: self._fetch(video_id, url))
+            return path
+        except Exception as e:
+            logger.warning(f"Gagal menyiapkan thumbnail {video_id}: {e}")
+            return None
+
+thumbnail_cache = ThumbnailCache(os.path.join(DOWNLOAD_DIR, "thumbs"), THUMB_CACHE_MAX_BYTES)
+
+# --- Antrean Job Media (yt-dlp) ---
+
+class MediaQueueFull(Exception):
+    """Dilempar saat antrean job media sudah penuh."""
+
+class MediaJobCancelled(Exception):
+    """Dilempar saat job media dibatalkan oleh user."""
+
+class MediaDeliveryFailed(Exception):
+    """Dilempar ke worker (`raise_busy=True`) saat media gagal diunduh atau dikirim, agar job dicoba ulang."""
+
+def _base_ydl_opts():
+    """Opsi yt-dlp yang dipakai bersama oleh probe metadata dan download."""
+    ydl_opts = {
+        'default_search': 'ytsearch', # Teks biasa dicari di YouTube (hasil pertama)
+        'noplaylist': True,
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True, # Progres dibaca lewat progress_hooks, bukan dicetak ke stdout
+    }
+
+    # Tambahkan opsi cookies jika file cookies.txt ada
+    if os.path.exists(COOKIES_FILE):
+        ydl_opts['cookiefile'] = COOKIES_FILE
+        logger.debug(f"Menggunakan file cookies: {COOKIES_FILE}")
+    else:
+        logger.warning(f"File cookies {COOKIES_FILE} tidak ditemukan. Konten YouTube mungkin tidak dapat diakses.")
+    return ydl_opts
+
+def _build_ydl_opts(is_video, format_spec=None, output_dir=DOWNLOAD_DIR):
+    """Menyusun opsi yt-dlp untuk download audio atau video."""
+    ydl_opts = _base_ydl_opts()
+    if format_spec:
+        media_format = format_spec
+    elif is_video:
+        # Tanpa hasil probe: biarkan yt-dlp menyaring format berdasarkan ukuran yang diketahui
+        size_filter = f"[filesize<?{VIDEO_MAX_BYTES}][filesize_approx<?{VIDEO_MAX_BYTES}]"
+        media_format = f'bestvideo[ext=mp4]{size_filter}+bestaudio[ext=m4a]/best[ext=mp4]{size_filter}'
+    elif AUDIO_PASSTHROUGH:
+        # Utamakan stream yang bisa langsung dikirim ke Telegram tanpa konversi
+        media_format = '/'.join(f'bestaudio[ext={ext}]' for ext in AUDIO_PASSTHROUGH_EXTS) + '/bestaudio/best'
+    else:
+        media_format = 'bestaudio/best'
+    ydl_opts.update({
+        'format': media_format,
+        'outtmpl': os.path.join(output_dir, '%(title).20s [%(id)s].%(ext)s'), # Batasi panjang judul; ID video mencegah nama file bentrok
+        'forcethumbnail': True, # Coba paksa thumbnail
+        'max_filesize': VIDEO_MAX_BYTES if is_video else None, # Pengaman terakhir jika perkiraan ukuran meleset
+        # Konversi audio tidak dilakukan di sini, tapi di ffmpeg_pool setelah download selesai
+    })
+    return ydl_opts
+
+def _ytdl_probe_sync(url_or_query):
+    """Mengambil metadata video tanpa mengunduh (download=False). Mengembalikan dict info atau None."""
+    import yt_dlp # Di-import saat dipakai agar startup bot tetap cepat
+
+    with yt_dlp.YoutubeDL(_base_ydl_opts()) as ydl:
+        info = ydl.extract_info(url_or_query, download=False)
+        if info and 'entries' in info: # Hasil pencarian (ytsearch) berisi daftar entri
+            entries = list(info['entries'])
+            info = entries[0] if entries else None
+        if not info:
+            return None
+        info = ydl.sanitize_info(info)
+    # Buang bagian besar yang tidak dipakai agar cache metadata tetap kecil
+    for key in ("automatic_captions", "subtitles", "heatmap", "requested_formats", "requested_downloads", "requested_subtitles"):
+        info.pop(key, None)
+    return info
+
+def _ytdl_download_sync(url_or_query, is_video, progress_queue, cancel_event, info=None, format_spec=None, output_dir=DOWNLOAD_DIR):
+    """Bagian blocking dari download yt-dlp; dijalankan di worker pool (thread atau proses).
+
+    Jika `info` hasil probe tersedia, ekstraksi dilewati dan yt-dlp langsung memproses metadata tersebut.
+    """
+    import yt_dlp
+
+    ydl_opts = _build_ydl_opts(is_video, format_spec, output_dir)
+
+    def progress_hook(d):
+        if cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Dibatalkan oleh user")
+        progress_queue.put({key: d.get(key) for key in ("status", "downloaded_bytes", "total_bytes", "total_bytes_estimate", "speed", "eta")})
+
+    def postprocessor_hook(d):
+        if d.get("status") == "started":
+            progress_queue.put({"status": "postprocessing", "postprocessor": d.get("postprocessor")})
+
+    ydl_opts['progress_hooks'] = [progress_hook]
+    ydl_opts['postprocessor_hooks'] = [postprocessor_hook]
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        if info:
+            info_dict = ydl.process_ie_result(copy.deepcopy(info), download=True)
+        else:
+            info_dict = ydl.extract_info(url_or_query, download=True)
+        if 'entries' in info_dict: # Hasil pencarian (ytsearch) berisi daftar entri
+            info_dict = info_dict['entries'][0]
+        # Dapatkan jalur file yang sebenarnya setelah diunduh (dan digabung untuk video)
+        if info_dict.get('requested_downloads'):
+            file_path = info_dict['requested_downloads'][0]['filepath']
+        else:
+            file_path = ydl.prepare_filename(info_dict)
+
+        # Coba dapatkan thumbnail
+        thumbnail_url = None
+        if info_dict.get('thumbnails'):
+            # Ambil thumbnail kualitas terbaik
+            thumbnail_url = info_dict['thumbnails'][-1]['url']
+        elif info_dict.get('thumbnail'):
+            thumbnail_url = info_dict['thumbnail']
+
+        return {
+            "file_path": file_path,
+            "title": info_dict.get('title'),
+            "duration": info_dict.get('duration'),
+            "thumbnail_url": thumbnail_url,
+            "thumbnails": [
+                {key: thumb.get(key) for key in ("url", "width", "height")} for thumb in info_dict.get('thumbnails') or []
+            ],
+            "video_id": info_dict.get('id'),
+            "acodec": info_dict.get('acodec'),
+        }
+
+# --- Pool FFmpeg ---
+
+class FFmpegPool:
+    """Menjalankan proses FFmpeg secara async dengan jumlah proses bersamaan yang dibatasi."""
+
+    def __init__(self, max_workers):
+        self.semaphore = asyncio.Semaphore(max_workers)
+
+    async def run(self, args, capture_output=False):
+        """Menjalankan FFmpeg; jika capture_output=True, isi stdout (mis. `pipe:1`) dikembalikan sebagai bytes."""
+        async with self.semaphore, track_backend("ffmpeg", "pipe" if capture_output else "convert"):
+            process = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *args,
+                stdout=asyncio.subprocess.PIPE if capture_output else asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                process.kill()
+                raise
+            if process.returncode != 0:
+                raise RuntimeError(f"FFmpeg gagal (kode {process.returncode}): {stderr.decode(errors='ignore')[-300:]}")
+            return stdout
+
+ffmpeg_pool = FFmpegPool(FFMPEG_MAX_WORKERS)
+
+def audio_postprocess_action(file_path, acodec):
+    """Menentukan proses yang dibutuhkan file audio: None (kirim apa adanya), "remux" atau "transcode"."""
+    ext = os.path.splitext(file_path)[1].lstrip(".").lower()
+    if AUDIO_PASSTHROUGH:
+        if ext in AUDIO_PASSTHROUGH_EXTS:
+            return None
+        if acodec and acodec.startswith("mp4a") and "m4a" in AUDIO_PASSTHROUGH_EXTS:
+            return "remux" # AAC di container lain cukup dipindah ke .m4a tanpa encode ulang
+    return None if ext == "mp3" else "transcode"
+
+async def postprocess_audio(media):
+    """Menyiapkan file audio agar bisa dikirim sebagai audio Telegram (MP3/M4A)."""
+    source = media["file_path"]
+    action = audio_postprocess_action(source, media.get("acodec"))
+    if not action:
+        return media
+
+    base_name = os.path.splitext(source)[0]
+    if action == "remux":
+        target = f"{base_name}.m4a"
+        args = ["-i", source, "-vn", "-c:a", "copy", target]
+    else:
+        target = f"{base_name}.mp3"
+        args = ["-i", source, "-vn", "-c:a", "libmp3lame", "-b:a", FFMPEG_AUDIO_BITRATE, target]
+    if target == source:
+        # FFmpeg tidak boleh menimpa input-nya sendiri (mis. mp3 dikeluarkan dari AUDIO_PASSTHROUGH_EXTS)
+        target = f"{base_name}.{action}{os.path.splitext(source)[1]}"
+        args[-1] = target
+
+    started = time.monotonic()
+    try:
+        await ffmpeg_pool.run(args)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(target)
+        raise
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(source)
+    logger.info(f"Audio di-{action} dalam {time.monotonic() - started:.1f} detik: {target}")
+    media["file_path"] = target
+    return media
+
+class MediaJob:
+    """Satu permintaan download media di dalam antrean."""
+
+    def __init__(self, user_id, url_or_query, is_video, progress_queue, cancel_event, info=None, format_spec=None, output_dir=DOWNLOAD_DIR):
+        self.id = uuid.uuid4().hex[:8]
+        self.user_id = user_id
+        self.url_or_query = url_or_query
+        self.is_video = is_video
+        self.info = info
+        self.format_spec = format_spec
+        self.output_dir = output_dir
+        self.progress_queue = progress_queue
+        self.cancel_event = cancel_event
+        self.future = asyncio.get_running_loop().create_future()
+        self.started = False
+        self.progress = {}
+
+class MediaJobQueue:
+    """Antrean job download yt-dlp dengan jumlah download bersamaan yang dibatasi.
+
+    Pekerjaan blocking (yt-dlp + FFmpeg) dijalankan di thread pool atau process pool
+    (MEDIA_EXECUTOR) sehingga event loop bot tetap responsif.
+    """
+
+    def __init__(self, max_workers, max_queue, executor_kind):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor_kind = executor_kind
+        self.pending = deque()
+        self.running = set()
+        self._queue = None
+        self._executor = None
+        self._manager = None
+        self._workers = []
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        if self.executor_kind == "process":
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+            self._manager = multiprocessing.Manager() # Queue/Event yang bisa dipakai lintas proses
+        else:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="media")
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        logger.info(f"Antrean media dimulai: {self.max_workers} worker ({self.executor_kind}).")
+
+    def submit(self, user_id, url_or_query, is_video, info=None, format_spec=None, output_dir=DOWNLOAD_DIR):
+        self._ensure_started()
+        if len(self.pending) >= self.max_queue:
+            raise MediaQueueFull(f"Antrean media penuh ({len(self.pending)} job menunggu).")
+        if self._manager:
+            progress_queue, cancel_event = self._manager.Queue(), self._manager.Event()
+        else:
+            progress_queue, cancel_event = queue.SimpleQueue(), threading.Event()
+        job = MediaJob(user_id, url_or_query, is_video, progress_queue, cancel_event, info, format_spec, output_dir)
+        self.pending.append(job)
+        self._queue.put_nowait(job)
+        return job
+
+    def position(self, job):
+        """Posisi job di antrean (1 = berikutnya), 0 jika sudah berjalan atau selesai."""
+        try:
+            return self.pending.index(job) + 1
+        except ValueError:
+            return 0
+
+    def jobs_for_user(self, user_id):
+        return [job for job in list(self.pending) + list(self.running) if job.user_id == user_id]
+
+    def cancel(self, job):
+        if job.future.done():
+            return False
+        job.cancel_event.set()
+        if job in self.pending:
+            self.pending.remove(job)
+            job.future.set_exception(MediaJobCancelled())
+        return True
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            if job.future.done(): # Dibatalkan saat masih di antrean
+                continue
+            with contextlib.suppress(ValueError):
+                self.pending.remove(job)
+            self.running.add(job)
+            job.started = True
+            try:
+                async with track_backend("ytdlp", "download"):
+                    result = await loop.run_in_executor(
+                        self._executor, _ytdl_download_sync,
+                        job.url_or_query, job.is_video, job.progress_queue, job.cancel_event, job.info, job.format_spec, job.output_dir
+                    )
+                record_bytes("ytdlp", "in", media_size(result["file_path"]) if result else 0)
+                if not job.future.done():
+                    job.future.set_result(result)
+            except Exception as e:
+                if job.cancel_event.is_set():
+                    logger.info(f"Job media {job.id} dibatalkan oleh user {job.user_id}.")
+                    e = MediaJobCancelled()
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self.running.discard(job)
+
+    def _drain_progress(self, job):
+        while True:
+            try:
+                job.progress.update(job.progress_queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def describe(self, job):
+        """Teks status job untuk ditampilkan ke user."""
+        if not job.started:
+            return f"🕒 Dalam antrean, posisi ke-**{self.position(job)}**.\nKetik `/cancel` untuk membatalkan."
+        self._drain_progress(job)
+        progress = job.progress
+        if progress.get("status") == "downloading":
+            total = progress.get("total_bytes") or progress.get("total_bytes_estimate")
+            downloaded = progress.get("downloaded_bytes") or 0
+            percent = f"{downloaded / total * 100:.0f}%" if total else "?"
+            speed = f"{format_bytes(progress.get('speed'))}/s" if progress.get("speed") else "?"
+            eta = f"{progress['eta']} detik" if progress.get("eta") is not None else "?"
+            return (
+                f"⬇️ Mengunduh... **{percent}** ({format_bytes(downloaded)} / {format_bytes(total)})\n"
+                f"Kecepatan: {speed} • Sisa waktu: {eta}\nKetik `/cancel` untuk membatalkan."
+            )
+        if progress.get("status") in ("finished", "postprocessing"):
+            return "⚙️ Download selesai, sedang memproses media..."
+        return "⏳ Menyiapkan download..."
+
+    async def wait(self, job, status_message=None):
+        """Menunggu job selesai sambil memperbarui pesan status secara berkala."""
+        last_text = None
+        while True:
+            try:
+                return await asyncio.wait_for(asyncio.shield(job.future), timeout=MEDIA_PROGRESS_INTERVAL)
+            except asyncio.TimeoutError:
+                if status_message:
+                    text = self.describe(job)
+                    if text != last_text:
+                        await safe_edit(status_message, text)
+                        last_text = text
+
+media_queue = MediaJobQueue(MEDIA_MAX_CONCURRENT_DOWNLOADS, MEDIA_MAX_QUEUE, MEDIA_EXECUTOR)
+
+@metrics.register_collector
+def _media_queue_metrics():
+    return [
+        ("bot_media_downloads_pending", "gauge", {}, len(media_queue.pending)),
+        ("bot_media_downloads_running", "gauge", {}, len(media_queue.running)),
+    ]
+
+async def download_youtube_media(url_or_query, is_video=False, user_id=None, status_message=None, info=None, format_spec=None, output_dir=DOWNLOAD_DIR):
+    """Mengunduh media dari YouTube menggunakan yt-dlp melalui antrean worker.
+
+    Mengembalikan dict berisi file_path, title, duration, thumbnail_url, thumbnails dan video_id, atau None
+    jika gagal. Melempar MediaQueueFull jika antrean penuh dan MediaJobCancelled jika dibatalkan user.
+    """
+    job = media_queue.submit(user_id, url_or_query, is_video, info, format_spec, output_dir)
+    try:
+        media = await media_queue.wait(job, status_message)
+        if not is_video and media:
+            if status_message and audio_postprocess_action(media["file_path"], media.get("acodec")):
+                await safe_edit(status_message, "⚙️ Download selesai, sedang mengonversi audio...")
+            media = await postprocess_audio(media)
+        return media
+    except MediaJobCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Error downloading YouTube media ({url_or_query}, video={is_video}): {e}")
+        return None
+
+@bot.on_message(filters.command("cancel") & filters.private)
+async def cancel_media_command(client, message):
+    job_id = message.command[1].strip() if len(message.command) > 1 else None
+    if core.bot_role == "dispatcher":
+        cancelled_count = await media_job_store.cancel_for_user(message.from_user.id, job_id)
+    else:
+        jobs = media_queue.jobs_for_user(message.from_user.id)
+        if job_id:
+            jobs = [job for job in jobs if job.id == job_id]
+        cancelled_count = len([job for job in jobs if media_queue.cancel(job)])
+    if not cancelled_count:
+        await message.reply_text("Tidak ada download aktif yang bisa dibatalkan.")
+        return
+    logger.info(f"User {message.from_user.id} membatalkan {cancelled_count} job media.")
+    await message.reply_text(f"🚫 {cancelled_count} download dibatalkan.")
+
+# --- Resolusi Query & Cache Metadata YouTube ---
+
+def normalize_media_query(query):
+    """Menormalkan query pencarian (huruf kecil, tanpa tanda baca, spasi dirapikan)."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", query.casefold())).strip()
+
+query_resolution_cache = TTLCache(MEDIA_QUERY_CACHE_MAX_ENTRIES, MEDIA_QUERY_CACHE_TTL) # query ternormalisasi -> ID video
+media_info_cache = TTLCache(MEDIA_INFO_CACHE_MAX_ENTRIES, MEDIA_INFO_CACHE_TTL) # ID video -> metadata hasil probe
+probe_semaphore = asyncio.Semaphore(MEDIA_PROBE_CONCURRENCY)
+probe_flights = SingleFlight()
+
+async def _probe_youtube_media(url_or_query):
+    async with probe_semaphore, track_backend("ytdlp", "probe"):
+        return await run_sync(_ytdl_probe_sync, url_or_query)
+
+async def resolve_youtube_media(url_or_query):
+    """Mengubah URL/query menjadi metadata video YouTube, memakai cache sebisa mungkin.
+
+    Query teks dipetakan ke ID video lewat query_resolution_cache, lalu metadata diambil dari
+    media_info_cache. Jika metadata tidak ada di cache, probe yt-dlp (download=False) dijalankan; untuk ID
+    yang sudah diketahui probe memakai URL video tersebut, bukan pencarian ulang.
+    Mengembalikan dict info atau None jika tidak ditemukan.
+    """
+    video_id = extract_youtube_video_id(url_or_query)
+    query_key = None
+    if not video_id:
+        query_key = normalize_media_query(url_or_query)
+        video_id = query_resolution_cache.get(query_key)
+    if video_id:
+        info = media_info_cache.get(video_id)
+        if info:
+            return info
+
+    # ID yang sudah diketahui dari cache cukup di-probe lewat URL-nya: tanpa ytsearch ulang yang bisa memilih video lain
+    probe_target = f"https://www.youtube.com/watch?v={video_id}" if video_id else url_or_query
+    try:
+        info, _ = await probe_flights.run(video_id or query_key, lambda: _probe_youtube_media(probe_target))
+    except Exception as e:
+        logger.warning(f"Probe metadata YouTube gagal untuk {url_or_query}: {e}")
+        return None
+    if not info or not info.get("id"):
+        return None
+    media_info_cache.set(info["id"], info)
+    if query_key:
+        query_resolution_cache.set(query_key, info["id"])
+    return info
+
+# --- Cache file_id Telegram untuk Media YouTube ---
+
+YOUTUBE_VIDEO_ID_PATTERN = re.compile(
+    r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)([A-Za-z0-9_-]{11})"
+)
+
+def extract_youtube_video_id(url_or_query):
+    """Mengambil ID video YouTube (11 karakter) dari URL, atau None jika bukan URL YouTube."""
+    match = YOUTUBE_VIDEO_ID_PATTERN.search(url_or_query)
+    return match.group(1) if match else None
+
+def media_quality(is_video):
+    """Label kualitas media yang dikirim; bagian dari key cache file_id."""
+    if is_video:
+        return f"mp4-max{VIDEO_MAX_BYTES // (1024 * 1024)}mb"
+    return "passthrough" if AUDIO_PASSTHROUGH else f"mp3-{FFMPEG_AUDIO_BITRATE}"
+
+def estimate_format_size(fmt, duration):
+    """Perkiraan ukuran (byte) satu format yt-dlp dari filesize, filesize_approx atau bitrate x durasi."""
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if not size and fmt.get("tbr") and duration:
+        size = fmt["tbr"] * 1000 / 8 * duration
+    return int(size) if size else None
+
+def select_video_format(info, max_bytes):
+    """Memilih format video terbaik (resolusi, lalu bitrate) yang perkiraan ukurannya muat dalam `max_bytes`.
+
+    Mengembalikan tuple (format_spec, perkiraan_ukuran). format_spec bernilai None jika tidak ada
+    format yang muat; perkiraan_ukuran lalu berisi ukuran kombinasi terkecil yang diketahui.
+    """
+    duration = info.get("duration")
+    formats = info.get("formats") or []
+    video_only = [f for f in formats if f.get("vcodec") not in (None, "none") and f.get("acodec") == "none" and f.get("ext") == "mp4"]
+    audio_only = [f for f in formats if f.get("acodec") not in (None, "none") and f.get("vcodec") == "none" and f.get("ext") == "m4a"]
+    progressive = [f for f in formats if f.get("vcodec") not in (None, "none") and f.get("acodec") not in (None, "none") and f.get("ext") == "mp4"]
+
+    candidates = []
+    best_audio = None
+    for fmt in audio_only:
+        size = estimate_format_size(fmt, duration)
+        if size and (best_audio is None or (fmt.get("abr") or 0) > (best_audio[0].get("abr") or 0)):
+            best_audio = (fmt, size)
+    if best_audio:
+        for fmt in video_only:
+            size = estimate_format_size(fmt, duration)
+            if size:
+                candidates.append((fmt.get("height") or 0, fmt.get("tbr") or 0, f"{fmt['format_id']}+{best_audio[0]['format_id']}", size + best_audio[1]))
+    for fmt in progressive:
+        size = estimate_format_size(fmt, duration)
+        if size:
+            candidates.append((fmt.get("height") or 0, fmt.get("tbr") or 0, fmt["format_id"], size))
+
+    fitting = [c for c in candidates if c[3] <= max_bytes]
+    if fitting:
+        best = max(fitting, key=lambda c: (c[0], c[1]))
+        return best[2], best[3]
+    smallest = min((c[3] for c in candidates), default=None)
+    return None, smallest
+
+class MediaFileIdCache:
+    """Indeks persisten (ID video, mode, kualitas) -> file_id Telegram dari media yang sudah pernah dikirim.
+
+    Entri yang tidak dipakai selama MEDIA_FILE_ID_TTL dihapus otomatis oleh TTL index MongoDB.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidated": 0}
+
+    @staticmethod
+    def make_key(video_id, kind, quality):
+        return f"{video_id}:{kind}:{quality}"
+
+    async def get(self, video_id, kind, quality):
+        try:
+            doc = await self.collection.find_one_and_update(
+                {"_id": self.make_key(video_id, kind, quality)},
+                {"$set": {"last_used": utc_now()}, "$inc": {"hits": 1}}
+            )
+        except Exception as e:
+            logger.warning(f"Gagal membaca cache file_id dari MongoDB: {e}")
+            doc = None
+        self.stats["hits" if doc else "misses"] += 1
+        return doc
+
+    async def store(self, video_id, kind, quality, file_id, title=None, duration=None):
+        doc = {
+            "video_id": video_id,
+            "kind": kind,
+            "quality": quality,
+            "file_id": file_id,
+            "title": title,
+            "duration": duration,
+            "last_used": utc_now(),
+        }
+        try:
+            await self.collection.update_one(
+                {"_id": self.make_key(video_id, kind, quality)},
+                {"$set": doc, "$setOnInsert": {"created_at": utc_now(), "hits": 0}},
+                upsert=True
+            )
+            self.stats["stores"] += 1
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan cache file_id ke MongoDB: {e}")
+
+    async def invalidate(self, video_id, kind, quality):
+        try:
+            await self.collection.delete_one({"_id": self.make_key(video_id, kind, quality)})
+            self.stats["invalidated"] += 1
+        except Exception as e:
+            logger.warning(f"Gagal menghapus cache file_id dari MongoDB: {e}")
+
+media_file_cache = MediaFileIdCache(media_file_ids_collection)
+
+def media_size(media):
+    """Ukuran (byte) file lokal atau BytesIO yang akan dikirim; 0 untuk file_id Telegram."""
+    if isinstance(media, io.BytesIO):
+        return len(media.getbuffer())
+    if isinstance(media, str) and os.path.isfile(media):
+        return os.path.getsize(media)
+    return 0
+
+async def send_youtube_media(message, is_video, media, title, duration, thumb=None):
+    """Mengirim audio/video ke chat; `media` bisa berupa path file lokal atau file_id Telegram."""
+    size = media_size(media)
+    async with track_backend("telegram_upload", ("video" if is_video else "audio") + ("" if size else "_file_id")):
+        if is_video:
+            sent = await message.reply_video(
+                video=media,
+                caption=f"✅ **{title or 'Video YouTube'}**",
+                duration=duration,
+                thumb=thumb,
+                parse_mode='Markdown'
+            )
+        else:
+            sent = await message.reply_audio(
+                audio=media,
+                caption=f"✅ **{title or 'Musik YouTube'}**",
+                duration=duration,
+                thumb=thumb,
+                parse_mode='Markdown'
+            )
+    record_bytes("telegram_upload", "out", size)
+    return sent
+
+def sent_file_id(sent_message, is_video):
+    """Mengambil file_id dari pesan media yang baru dikirim."""
+    media = (sent_message.video if is_video else sent_message.audio) or sent_message.document
+    return media.file_id if media else None
+
+async def send_cached_youtube_media(message, video_id, is_video):
+    """Mengirim ulang media dari cache file_id. Mengembalikan True jika berhasil."""
+    if not MEDIA_FILE_ID_CACHE_ENABLED or not video_id:
+        return False
+    kind, quality = ("video" if is_video else "audio"), media_quality(is_video)
+    cached = await media_file_cache.get(video_id, kind, quality)
+    if not cached:
+        return False
+    try:
+        await send_youtube_media(message, is_video, cached["file_id"], cached.get("title"), cached.get("duration"))
+        logger.info(f"Media {video_id} ({kind}) dikirim ulang dari cache file_id.")
+        return True
+    except BadRequest as e:
+        # file_id sudah tidak berlaku (mis. FILE_REFERENCE_EXPIRED / MEDIA_EMPTY): hapus dan unduh ulang
+        logger.warning(f"file_id cache untuk {video_id} ({kind}) tidak berlaku lagi: {e}")
+        await media_file_cache.invalidate(video_id, kind, quality)
+        return False
+
+media_flights = SingleFlight()
+
+def media_from_info(info, file_path):
+    """Menyusun dict media (format hasil download_youtube_media) dari metadata probe dan file lokal."""
+    thumbnail_url = info['thumbnails'][-1]['url'] if info.get('thumbnails') else info.get('thumbnail')
+    return {
+        "file_path": file_path,
+        "title": info.get("title"),
+        "duration": info.get("duration"),
+        "thumbnail_url": thumbnail_url,
+        "thumbnails": info.get("thumbnails"),
+        "video_id": info.get("id"),
+        "acodec": info.get("acodec"),
+    }
+
+# --- Pipeline Media di Memori ---
+
+class MediaNotBufferable(Exception):
+    """Dilempar saat media ternyata tidak bisa/layak di-buffer di memori; jalur disk dipakai."""
+
+memory_fetch_semaphore = asyncio.Semaphore(MEDIA_MAX_CONCURRENT_DOWNLOADS)
+
+def select_audio_format(info):
+    """Memilih stream audio-only terbaik: utamakan format passthrough, lalu bitrate tertinggi."""
+    audio_only = [
+        f for f in info.get("formats") or []
+        if f.get("acodec") not in (None, "none") and f.get("vcodec") == "none" and f.get("protocol") in ("http", "https")
+    ]
+    if not audio_only:
+        return None
+    passthrough = [f for f in audio_only if f.get("ext") in AUDIO_PASSTHROUGH_EXTS] if AUDIO_PASSTHROUGH else []
+    return max(passthrough or audio_only, key=lambda f: f.get("abr") or f.get("tbr") or 0)
+
+def _media_file_name(info, ext):
+    title = re.sub(r'[\\/:*?"<>|]+', "_", info.get("title") or info.get("id") or "media")[:60]
+    return f"{title}.{ext}"
+
+async def fetch_format_to_memory(fmt, max_bytes):
+    """Mengunduh satu format langsung ke BytesIO lewat HTTP (potongan Range), tanpa menulis ke disk."""
+    session = await get_http_session()
+    headers = dict(fmt.get("http_headers") or {})
+    buffer = io.BytesIO()
+    total = None
+    while total is None or buffer.tell() < total:
+        start = buffer.tell()
+        headers["Range"] = f"bytes={start}-{start + MEDIA_HTTP_CHUNK_SIZE - 1}"
+        async with session.get(fmt["url"], headers=headers) as response:
+            response.raise_for_status()
+            content_range = response.headers.get("Content-Range", "")
+            if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+                total = int(content_range.rsplit("/", 1)[1])
+            elif response.status == 200: # Server mengabaikan Range dan mengirim seluruh file
+                total = int(response.headers.get("Content-Length") or 0) or None
+            if total and total > max_bytes:
+                raise MediaNotBufferable(f"Ukuran {format_bytes(total)} melebihi batas memori.")
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                buffer.write(chunk)
+                if buffer.tell() > max_bytes:
+                    raise MediaNotBufferable("Ukuran melebihi batas memori.")
+        if buffer.tell() == start: # Tidak ada data baru
+            break
+        if total is None:
+            total = buffer.tell()
+    buffer.seek(0)
+    return buffer
+
+async def transcode_format_to_memory(fmt, max_bytes):
+    """Download dan konversi MP3 sekaligus: FFmpeg membaca URL stream dan menulis hasil ke pipe."""
+    header_lines = "".join(f"{key}: {value}\r\n" for key, value in (fmt.get("http_headers") or {}).items())
+    args = ["-headers", header_lines, "-i", fmt["url"], "-vn", "-c:a", "libmp3lame", "-b:a", FFMPEG_AUDIO_BITRATE, "-f", "mp3", "pipe:1"]
+    data = await ffmpeg_pool.run(args, capture_output=True)
+    if len(data) > max_bytes:
+        raise MediaNotBufferable("Hasil konversi melebihi batas memori.")
+    return io.BytesIO(data)
+
+async def fetch_youtube_media_in_memory(info, is_video, format_spec=None, status_message=None):
+    """Mencoba menyiapkan media kecil sepenuhnya di memori.
+
+    Mengembalikan dict media (dengan file-like di "file_path") atau None jika media terlalu besar,
+    butuh penggabungan stream, atau bukan stream HTTP biasa; dalam hal itu jalur disk dipakai.
+    """
+    duration = info.get("duration")
+    if is_video:
+        if not format_spec or "+" in format_spec:
+            return None # Video+audio terpisah perlu digabung FFmpeg di disk
+        fmt = next((f for f in info.get("formats") or [] if f.get("format_id") == format_spec), None)
+        if not fmt or fmt.get("protocol") not in ("http", "https"):
+            return None
+        action, ext = None, fmt.get("ext") or "mp4"
+    else:
+        fmt = select_audio_format(info)
+        if not fmt:
+            return None
+        ext = fmt.get("ext") or "m4a"
+        action = audio_postprocess_action(f"media.{ext}", fmt.get("acodec"))
+        if action == "remux":
+            return None # Remux ke container MP4 butuh file yang bisa di-seek
+        if action == "transcode":
+            ext = "mp3"
+
+    if action == "transcode":
+        bitrate = int(FFMPEG_AUDIO_BITRATE.rstrip("k")) * 1000
+        estimated = bitrate / 8 * duration if duration else None
+    else:
+        estimated = estimate_format_size(fmt, duration)
+    if not estimated or estimated > MEDIA_MEMORY_THRESHOLD:
+        return None
+
+    if status_message:
+        await safe_edit(status_message, "⬇️ Mengunduh langsung ke memori...")
+    started = time.monotonic()
+    try:
+        async with memory_fetch_semaphore, track_backend("youtube_http", action or "fetch"):
+            if action == "transcode":
+                buffer = await transcode_format_to_memory(fmt, MEDIA_MEMORY_THRESHOLD * 2)
+            else:
+                buffer = await fetch_format_to_memory(fmt, MEDIA_MEMORY_THRESHOLD * 2)
+        record_bytes("youtube_http", "in", len(buffer.getbuffer()))
+    except Exception as e:
+        logger.warning(f"Pipeline memori gagal untuk {info.get('id')}, beralih ke disk: {e}")
+        return None
+    buffer.name = _media_file_name(info, ext) # Pyrogram membutuhkan atribut name pada file-like
+    logger.info(f"Media {info.get('id')} disiapkan di memori ({format_bytes(len(buffer.getbuffer()))}) dalam {time.monotonic() - started:.1f} detik.")
+    media = media_from_info(info, buffer)
+    return media
+
+async def _download_and_send_youtube_media(message, status_message, query, is_video, info=None, format_spec=None, expected_bytes=0):
+    """Mengunduh lalu mengirim media ke user. Mengembalikan dict file_id/title/duration, atau None jika gagal."""
+    label = "video" if is_video else "musik"
+    kind = "video" if is_video else "audio"
+    content_key = f"{info['id']}:{kind}:{media_quality(is_video)}" if info and info.get("id") else None
+
+    # Thumbnail disiapkan bersamaan dengan download media
+    thumb_task = asyncio.create_task(thumbnail_cache.get(info["id"], info)) if info and info.get("id") else None
+    local_path = await run_sync(scratch_store.lookup, content_key) if content_key else None
+    job_dir = None
+    try:
+        media = None
+        if local_path:
+            logger.info(f"{label.capitalize()} {info['id']} dipakai ulang dari scratch: {local_path}")
+            media = media_from_info(info, local_path)
+        elif info:
+            media = await fetch_youtube_media_in_memory(info, is_video, format_spec, status_message)
+        if media is None:
+            job_dir = await run_sync(scratch_store.new_job_dir, content_key or query, expected_bytes or 0)
+            media = await download_youtube_media(
+                query, is_video=is_video, user_id=message.from_user.id, status_message=status_message,
+                info=info, format_spec=format_spec, output_dir=job_dir
+            )
+            if media and content_key and os.path.exists(media["file_path"]):
+                media["file_path"] = await run_sync(scratch_store.commit, content_key, media["file_path"])
+
+        file_path = media["file_path"] if media else None
+        in_memory = isinstance(file_path, io.BytesIO)
+        if not file_path or (not in_memory and not os.path.exists(file_path)):
+            await finish_status(message, status_message, f"❌ Gagal mengunduh {label}. Mungkin URL tidak valid, tidak ditemukan, atau masalah jaringan/server.")
+            return None
+
+        try:
+            if thumb_task:
+                thumb_path = await thumb_task
+            else:
+                thumb_path = await thumbnail_cache.get(media["video_id"], media)
+            with contextlib.nullcontext() if in_memory else scratch_store.lease(file_path):
+                sent = await send_youtube_media(
+                    message, is_video, file_path, media["title"], media["duration"], thumb=thumb_path
+                )
+            logger.info(f"{label.capitalize()} berhasil dikirim: {file_path.name if in_memory else file_path}")
+            file_id = sent_file_id(sent, is_video)
+            if MEDIA_FILE_ID_CACHE_ENABLED and file_id and media["video_id"]:
+                await media_file_cache.store(
+                    media["video_id"], kind, media_quality(is_video),
+                    file_id, media["title"], media["duration"]
+                )
+            return {"file_id": file_id, "title": media["title"], "duration": media["duration"]}
+        except Exception as e:
+            logger.error(f"Error saat mengirim {label} {media['video_id'] or query}: {e}")
+            await finish_status(message, status_message, f"❌ Terjadi kesalahan saat mengirim {label}: `{e}`")
+            return None
+    finally:
+        if thumb_task and not thumb_task.done():
+            thumb_task.cancel()
+        if job_dir:
+            await run_sync(scratch_store.discard_job_dir, job_dir)
+
+async def deliver_youtube_media(message, status_message, query, is_video, raise_busy=False):
+    """Mengirim media YouTube ke user: dari cache file_id bila ada, jika tidak unduh lalu upload.
+
+    Permintaan identik yang datang bersamaan digabung: hanya satu yang mengunduh, sisanya
+    menerima file_id hasil upload pertama. Pada --role=dispatcher pekerjaan download diserahkan
+    ke worker lewat media_job_store. Dengan `raise_busy=True` (dipakai worker), antrean atau
+    penyimpanan yang penuh dan download/upload yang gagal dilempar sebagai exception agar job dicoba ulang.
+    """
+    label = "video" if is_video else "musik"
+    if core.bot_role == "dispatcher":
+        if await send_cached_youtube_media(message, extract_youtube_video_id(query), is_video):
+            return
+        try:
+            job_id = await media_job_store.enqueue(message, status_message, query, is_video)
+        except Exception as e:
+            logger.error(f"Gagal mengantrekan job media ({label}) untuk user {message.from_user.id}: {e}")
+            await finish_status(message, status_message, "❌ Antrean worker sedang tidak tersedia. Silakan coba lagi beberapa saat lagi.")
+            return
+        logger.info(f"Job media {job_id} ({label}) untuk user {message.from_user.id} diserahkan ke worker.")
+        await safe_edit(status_message, f"🕒 Permintaan {label} masuk antrean worker (job `{job_id}`).\nKetik `/cancel {job_id}` untuk membatalkan.", final=True)
+        return
+
+    info = await resolve_youtube_media(query)
+    video_id = info["id"] if info else extract_youtube_video_id(query)
+    if await send_cached_youtube_media(message, video_id, is_video):
+        return
+
+    format_spec = None
+    expected_bytes = (info.get("filesize") or info.get("filesize_approx") or 0) if info else 0
+    if is_video and info:
+        format_spec, estimated_size = select_video_format(info, VIDEO_MAX_BYTES)
+        if format_spec:
+            expected_bytes = estimated_size
+            logger.info(f"Format video {format_spec} dipilih untuk {video_id} (perkiraan {format_bytes(estimated_size)}).")
+        elif estimated_size:
+            logger.info(f"Video {video_id} ditolak: versi terkecil {format_bytes(estimated_size)} melebihi batas {format_bytes(VIDEO_MAX_BYTES)}.")
+            await safe_edit(
+                status_message,
+                f"❌ Video terlalu besar untuk dikirim lewat Telegram.\n"
+                f"Perkiraan ukuran terkecil: **{format_bytes(estimated_size)}**, batas: **{format_bytes(VIDEO_MAX_BYTES)}**.",
+                final=True
+            )
+            return
+
+    flight_key = f"{video_id or normalize_media_query(query)}:{'video' if is_video else 'audio'}:{media_quality(is_video)}"
+    while True:
+        is_follower = media_flights.is_inflight(flight_key)
+        if is_follower:
+            await safe_edit(status_message, f"🔁 {label.capitalize()} yang sama sedang diunduh untuk pengguna lain, menunggu hasilnya...")
+        try:
+            outcome, is_leader = await media_flights.run(
+                flight_key, lambda: _download_and_send_youtube_media(
+                    message, status_message, query, is_video, info, format_spec, expected_bytes
+                )
+            )
+        except MediaQueueFull:
+            if raise_busy:
+                raise
+            await safe_edit(status_message, "⏳ Antrean download sedang penuh. Silakan coba lagi beberapa saat lagi.", final=True)
+            return
+        except ScratchQuotaExceeded:
+            if raise_busy:
+                raise
+            await safe_edit(status_message, "⏳ Penyimpanan server sedang penuh oleh download lain. Silakan coba lagi beberapa saat lagi.", final=True)
+            return
+        except (MediaJobCancelled, FlightAborted):
+            if is_follower:
+                continue # Download milik pengguna lain dibatalkan; kerjakan sendiri
+            await safe_edit(status_message, f"🚫 Download {label} dibatalkan.", final=True)
+            return
+        except Exception as e:
+            logger.error(f"Error saat menunggu download {label} bersama ({flight_key}): {e}")
+            outcome, is_leader = None, False
+        break
+
+    if is_leader:
+        if outcome is None and raise_busy:
+            raise MediaDeliveryFailed(f"Gagal mengunduh atau mengirim {label}: {query}")
+        return
+    if outcome and outcome.get("file_id"):
+        try:
+            await send_youtube_media(message, is_video, outcome["file_id"], outcome["title"], outcome["duration"])
+            logger.info(f"{label.capitalize()} hasil download bersama dikirim ke user {message.from_user.id}")
+            return
+        except Exception as e:
+            logger.error(f"Error saat mengirim ulang {label} ({flight_key}): {e}")
+    if raise_busy:
+        raise MediaDeliveryFailed(f"Gagal mengunduh atau mengirim {label}: {query}")
+    await finish_status(message, status_message, f"❌ Gagal mengunduh {label}. Mungkin URL tidak valid, tidak ditemukan, atau masalah jaringan/server.")
+
+# --- Antrean Media Terdistribusi (--role=dispatcher|worker) ---
+
+class DistributedMediaQueue:
+    """Antrean job media di MongoDB agar download dan upload bisa dikerjakan proses worker terpisah.
+
+    Worker mengklaim job dengan lease yang diperpanjang berkala (heartbeat). Job yang lease-nya habis
+    (worker mati) diambil worker lain; job yang gagal dicoba ulang dengan backoff hingga
+    MEDIA_JOB_MAX_ATTEMPTS kali lalu dipindah ke status "dead" (dead-letter) beserta error terakhir.
+    """
+
+    def __init__(self, collection, lease_seconds, max_attempts, retry_delay, retention):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.retention = retention
+
+    async def enqueue(self, message, status_message, query, is_video):
+        now = utc_now()
+        job_id = uuid.uuid4().hex[:8]
+        await self.collection.insert_one({
+            "_id": job_id,
+            "status": "queued",
+            "user_id": message.from_user.id,
+            "chat_id": message.chat.id,
+            "message_id": message.id,
+            "status_message_id": status_message.id,
+            "query": query,
+            "is_video": is_video,
+            "attempts": 0,
+            "not_before": now,
+            "created_at": now,
+            "updated_at": now,
+        })
+        return job_id
+
+    async def claim(self, worker_id):
+        """Mengambil job tertua yang siap dikerjakan (atau yang lease-nya habis). Mengembalikan dokumen job atau None."""
+        from pymongo import ReturnDocument
+
+        now = utc_now()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "not_before": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": "running", "worker_id": worker_id, "lease_until": now + timedelta(seconds=self.lease_seconds), "updated_at": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def heartbeat(self, job_id, worker_id):
+        """Memperpanjang lease. Mengembalikan dokumen job terbaru, atau None jika lease sudah diambil worker lain."""
+        from pymongo import ReturnDocument
+
+        now = utc_now()
+        return await self.collection.find_one_and_update(
+            {"_id": job_id, "status": "running", "worker_id": worker_id},
+            {"$set": {"lease_until": now + timedelta(seconds=self.lease_seconds), "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _finish(self, job_id, worker_id, status, **fields):
+        now = utc_now()
+        await self.collection.update_one(
+            {"_id": job_id, "worker_id": worker_id},
+            {"$set": {"status": status, "updated_at": now, "expires_at": now + timedelta(seconds=self.retention), **fields}}
+        )
+
+    async def complete(self, job, worker_id):
+        await self._finish(job["_id"], worker_id, "cancelled" if job.get("cancel_requested") else "done")
+
+    async def fail(self, job, worker_id, error):
+        """Mencatat kegagalan job. Mengembalikan "queued" jika akan dicoba ulang, atau "dead" jika sudah menyerah."""
+        if job["attempts"] >= self.max_attempts:
+            await self._finish(job["_id"], worker_id, "dead", error=error)
+            return "dead"
+        now = utc_now()
+        delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+        await self.collection.update_one(
+            {"_id": job["_id"], "worker_id": worker_id},
+            {"$set": {"status": "queued", "error": error, "not_before": now + timedelta(seconds=delay), "updated_at": now}}
+        )
+        return "queued"
+
+    async def release(self, job, worker_id):
+        """Mengembalikan job yang dihentikan di tengah jalan (worker berhenti) ke antrean tanpa menghitung percobaannya."""
+        now = utc_now()
+        await self.collection.update_one(
+            {"_id": job["_id"], "status": "running", "worker_id": worker_id},
+            {"$set": {"status": "queued", "not_before": now, "updated_at": now}, "$inc": {"attempts": -1}}
+        )
+
+    async def cancel_for_user(self, user_id, job_id=None):
+        """Membatalkan job milik user: yang masih antre langsung dibatalkan, yang sedang berjalan diberi tanda untuk worker."""
+        query = {"user_id": user_id}
+        if job_id:
+            query["_id"] = job_id
+        now = utc_now()
+        queued = await self.collection.update_many(
+            {**query, "status": "queued"},
+            {"$set": {"status": "cancelled", "updated_at": now, "expires_at": now + timedelta(seconds=self.retention)}}
+        )
+        running = await self.collection.update_many(
+            {**query, "status": "running", "cancel_requested": {"$ne": True}},
+            {"$set": {"cancel_requested": True, "updated_at": now}}
+        )
+        return queued.modified_count + running.modified_count
+
+    async def counts(self):
+        """Jumlah job per status."""
+        counts = {}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+media_job_store = DistributedMediaQueue(
+    media_jobs_collection, MEDIA_JOB_LEASE, MEDIA_JOB_MAX_ATTEMPTS, MEDIA_JOB_RETRY_DELAY, MEDIA_JOB_RETENTION
+)
+
+class MediaWorker:
+    """Proses worker: mengklaim job dari media_job_store, menjalankan pipeline media lokal, dan mengunggah hasilnya
+    dengan client Telegram milik worker sendiri."""
+
+    def __init__(self, store, concurrency, poll_interval):
+        self.store = store
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.slots = asyncio.Semaphore(concurrency)
+        self.tasks = set()
+
+    async def run(self, client):
+        logger.info(f"Worker media {self.worker_id} berjalan ({self.concurrency} job bersamaan).")
+        while True:
+            await self.slots.acquire()
+            try:
+                job = await self.store.claim(self.worker_id)
+            except Exception as e:
+                logger.error(f"Gagal mengklaim job media dari MongoDB: {e}")
+                job = None
+            if job is None:
+                self.slots.release()
+                await asyncio.sleep(self.poll_interval)
+                continue
+            task = asyncio.create_task(self._process(client, job))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _heartbeat(self, job, processing_task):
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            try:
+                latest = await self.store.heartbeat(job["_id"], self.worker_id)
+            except Exception as e:
+                logger.warning(f"Gagal memperpanjang lease job media {job['_id']}: {e}")
+                continue
+            if latest is None:
+                logger.warning(f"Lease job media {job['_id']} hilang, job dihentikan di worker ini.")
+                processing_task.cancel()
+                return
+            if latest.get("cancel_requested"):
+                job["cancel_requested"] = True
+                for local_job in media_queue.jobs_for_user(job["user_id"]):
+                    if local_job.url_or_query == job["query"]:
+                        media_queue.cancel(local_job)
+
+    async def _process(self, client, job):
+        label = "video" if job["is_video"] else "musik"
+        status_message = None
+        heartbeat_task = asyncio.create_task(self._heartbeat(job, asyncio.current_task()))
+        try:
+            if job["attempts"] > self.store.max_attempts:
+                raise RuntimeError("Lease habis berulang kali, worker kemungkinan crash saat memproses job ini.")
+            message = await client.get_messages(job["chat_id"], job["message_id"])
+            status_message = await client.get_messages(job["chat_id"], job["status_message_id"])
+            if message.empty:
+                raise RuntimeError("Pesan perintah asli tidak ditemukan.")
+            if status_message.empty:
+                status_message = await message.reply_text(f"⏳ Memproses {label} untuk: `{job['query']}`...")
+            logger.info(f"Worker {self.worker_id} memproses job media {job['_id']} (percobaan {job['attempts']}).")
+            await deliver_youtube_media(message, status_message, job["query"], job["is_video"], raise_busy=True)
+            await self.store.complete(job, self.worker_id)
+        except asyncio.CancelledError:
+            logger.info(f"Job media {job['_id']} dihentikan di worker {self.worker_id}.")
+            try:
+                await self.store.release(job, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Gagal mengembalikan job media {job['_id']} ke antrean: {e}")
+            raise
+        except Exception as e:
+            outcome = await self.store.fail(job, self.worker_id, repr(e))
+            logger.error(f"Job media {job['_id']} gagal (percobaan {job['attempts']}, {outcome}): {e!r}")
+            if status_message is not None and not status_message.empty:
+                if outcome == "dead":
+                    await safe_edit(status_message, f"❌ Gagal memproses {label} setelah {job['attempts']} percobaan. Silakan coba lagi nanti.", final=True)
+                else:
+                    await safe_edit(status_message, f"⏳ Server sedang sibuk, {label} akan dicoba lagi sebentar lagi...", final=True)
+        finally:
+            heartbeat_task.cancel()
+            self.slots.release()
+
+async def run_media_worker_node():
+    """Menjalankan proses dengan --role=worker: tanpa handler perintah, hanya mengerjakan job media."""
+    await run_sync(scratch_store.sweep)
+    worker_client = GovernedClient(
+        f"media_worker_{os.getpid()}",
+        api_id=API_ID,
+        api_hash=API_HASH,
+        bot_token=BOT_TOKEN,
+        in_memory=True,
+        no_updates=True # Update dari Telegram hanya diterima proses dispatcher
+    )
+    await worker_client.start()
+    worker = MediaWorker(media_job_store, MEDIA_WORKER_CONCURRENCY, MEDIA_JOB_POLL_INTERVAL)
+    sweeper_task = asyncio.create_task(scratch_store.run_sweeper(SCRATCH_SWEEP_INTERVAL))
+    worker_task = asyncio.create_task(worker.run(worker_client))
+    await idle()
+    job_tasks = list(worker.tasks)
+    for task in (worker_task, sweeper_task, *job_tasks):
+        task.cancel() # Job yang belum selesai dikembalikan ke antrean oleh MediaWorker._process
+    # Ditunggu agar blok finally (lepas lease, slot, heartbeat) selesai sebelum client dihentikan
+    await asyncio.gather(worker_task, sweeper_task, *job_tasks, return_exceptions=True)
+    return worker_client
+
+# --- Batch /song (playlist atau beberapa query) ---
+
+YOUTUBE_PLAYLIST_PATTERN = re.compile(r"youtube\.com/playlist\?(?:.*&)?list=([\w-]+)")
+
+def _ytdl_playlist_sync(url, limit):
+    """Mengambil daftar URL video dari playlist YouTube tanpa memproses tiap video (extract_flat)."""
+    import yt_dlp # Di-import saat dipakai agar startup bot tetap cepat
+
+    ydl_opts = {**_base_ydl_opts(), 'noplaylist': False, 'extract_flat': 'in_playlist', 'playlistend': limit}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+    entries = [entry for entry in (info or {}).get('entries') or [] if entry and entry.get('id')]
+    return [f"https://www.youtube.com/watch?v={entry['id']}" for entry in entries[:limit]]
+
+def song_batch_limit(user_id):
+    """Jumlah lagu maksimal per batch. Untuk pengguna biasa dibatasi agar biayanya muat di token bucket."""
+    if is_owner_or_admin(user_id) or not SONG_BATCH_ITEM_COST:
+        return SONG_BATCH_MAX_ITEMS
+    # Biaya /song sudah diambil fair_scheduled; sisa kapasitas bucket menentukan jumlah lagu tambahan
+    affordable = 1 + (fair_scheduler.burst - COMMAND_COSTS.get("song", 1)) // SONG_BATCH_ITEM_COST
+    return max(1, min(SONG_BATCH_MAX_ITEMS, affordable))
+
+async def parse_song_batch(text, max_items=SONG_BATCH_MAX_ITEMS):
+    """Memecah argumen /song menjadi daftar query. Mengembalikan (daftar_query, terpotong) atau
+    (None, False) jika argumen hanya satu query biasa."""
+    text = text.strip()
+    if YOUTUBE_PLAYLIST_PATTERN.search(text):
+        # Ambil satu entri lebih banyak untuk mengetahui apakah playlist terpotong
+        queries = await _probe_youtube_media_playlist(text, max_items + 1)
+    else:
+        queries = [part.strip() for part in re.split(f"[{re.escape(SONG_BATCH_DELIMITERS)}]", text) if part.strip()]
+        if len(queries) < 2:
+            return None, False
+    return queries[:max_items], len(queries) > max_items
+
+async def _probe_youtube_media_playlist(url, limit):
+    async with probe_semaphore, track_backend("ytdlp", "playlist"):
+        return await run_sync(_ytdl_playlist_sync, url, limit)
+
+async def prepare_batch_audio(message, query):
+    """Menyiapkan satu lagu batch tanpa mengirimnya.
+
+    Mengembalikan dict dengan "file_id" (dari cache) atau "media" (file lokal/di memori) beserta
+    title, duration, thumb, video_id dan job_dir yang harus dibersihkan setelah dikirim.
+    """
+    info = await resolve_youtube_media(query)
+    if not info:
+        raise ValueError("tidak ditemukan")
+    video_id = info.get("id")
+    quality = media_quality(False)
+    if MEDIA_FILE_ID_CACHE_ENABLED and video_id:
+        cached = await media_file_cache.get(video_id, "audio", quality)
+        if cached:
+            return {"file_id": cached["file_id"], "title": cached.get("title"), "duration": cached.get("duration"), "video_id": video_id}
+
+    content_key = f"{video_id}:audio:{quality}" if video_id else None
+    thumb_task = asyncio.create_task(thumbnail_cache.get(video_id, info)) if video_id else None
+    job_dir = None
+    try:
+        local_path = await run_sync(scratch_store.lookup, content_key) if content_key else None
+        media = media_from_info(info, local_path) if local_path else await fetch_youtube_media_in_memory(info, False)
+        if media is None:
+            expected_bytes = info.get("filesize") or info.get("filesize_approx") or 0
+            job_dir = await run_sync(scratch_store.new_job_dir, content_key or query, expected_bytes)
+            media = await download_youtube_media(query, is_video=False, user_id=message.from_user.id, info=info, output_dir=job_dir)
+            if not media:
+                raise ValueError("gagal diunduh")
+            if content_key and os.path.exists(media["file_path"]):
+                media["file_path"] = await run_sync(scratch_store.commit, content_key, media["file_path"])
+        thumb = await thumb_task if thumb_task else None
+        return {"media": media["file_path"], "title": media["title"], "duration": media["duration"], "thumb": thumb, "video_id": video_id, "job_dir": job_dir}
+    except BaseException:
+        if thumb_task and not thumb_task.done():
+            thumb_task.cancel()
+        if job_dir:
+            await run_sync(scratch_store.discard_job_dir, job_dir)
+        raise
+
+async def send_batch_audio_group(message, items):
+    """Mengirim lagu-lagu yang sudah siap sebagai media group (maks. 10 per grup) sesuai urutan."""
+    for start in range(0, len(items), 10):
+        group = items[start:start + 10]
+        with contextlib.ExitStack() as leases:
+            media = []
+            for item in group:
+                source = item.get("file_id") or item["media"]
+                if not item.get("file_id") and not isinstance(source, io.BytesIO):
+                    leases.enter_context(scratch_store.lease(source))
+                media.append(InputMediaAudio(
+                    source, thumb=item.get("thumb"), caption=f"✅ **{item['title'] or 'Musik YouTube'}**",
+                    duration=item.get("duration") or 0, title=item["title"] or ""
+                ))
+            if len(media) == 1:
+                sent = [await send_youtube_media(message, False, media[0].media, group[0]["title"], group[0]["duration"], group[0].get("thumb"))]
+            else:
+                size = sum(media_size(item.media) for item in media)
+                async with track_backend("telegram_upload", "media_group"):
+                    sent = await message.reply_media_group(media)
+                record_bytes("telegram_upload", "out", size)
+        for item, sent_message in zip(group, sent):
+            file_id = sent_file_id(sent_message, False)
+            if MEDIA_FILE_ID_CACHE_ENABLED and file_id and item["video_id"] and not item.get("file_id"):
+                await media_file_cache.store(item["video_id"], "audio", media_quality(False), file_id, item["title"], item["duration"])
+
+async def deliver_song_batch(message, status_message, queries, truncated=False):
+    """Mengunduh beberapa lagu dengan paralelisme terbatas lalu mengirimnya berurutan sebagai media group.
+
+    Grup dikirim begitu lagu-lagunya siap (atau lebih awal jika buffer di memori melebihi SONG_BATCH_MAX_BUFFERED).
+    Item yang gagal dilewati dan dilaporkan di pesan status tanpa menggagalkan batch.
+    """
+    if core.bot_role == "dispatcher":
+        # Worker mengerjakan tiap lagu sebagai job terpisah (dikirim satu per satu, bukan media group)
+        try:
+            job_ids = [await media_job_store.enqueue(message, status_message, query, False) for query in queries]
+        except Exception as e:
+            logger.error(f"Gagal mengantrekan batch song untuk user {message.from_user.id}: {e}")
+            await finish_status(message, status_message, "❌ Antrean worker sedang tidak tersedia. Silakan coba lagi beberapa saat lagi.")
+            return
+        await safe_edit(status_message, f"🕒 {len(job_ids)} lagu masuk antrean worker.\nKetik `/cancel` untuk membatalkan.", final=True)
+        return
+
+    semaphore = asyncio.Semaphore(SONG_BATCH_CONCURRENCY) # Batas per batch agar playlist besar tidak memonopoli antrean
+    done = 0
+
+    async def prepare(query):
+        nonlocal done
+        async with semaphore:
+            try:
+                result = await prepare_batch_audio(message, query)
+            except (MediaJobCancelled, FlightAborted):
+                raise
+            except Exception as e:
+                logger.warning(f"Item batch /song gagal ({query}): {e!r}")
+                result = e
+            done += 1
+            await safe_edit(status_message, f"⏳ Menyiapkan lagu **{done}/{len(queries)}**...\nKetik `/cancel` untuk membatalkan.")
+            return result
+
+    tasks = [asyncio.create_task(prepare(query)) for query in queries]
+    group, failed = [], []
+    buffered = 0 # Byte lagu di memori (BytesIO) dalam `group` yang belum dikirim
+
+    async def flush():
+        nonlocal buffered
+        try:
+            await send_batch_audio_group(message, group)
+        except Exception as e:
+            logger.error(f"Error saat mengirim media group batch /song: {e}")
+            failed.extend(item["query"] for item in group)
+        finally:
+            for item in group:
+                if item.get("job_dir"):
+                    await run_sync(scratch_store.discard_job_dir, item["job_dir"])
+            group.clear()
+            buffered = 0
+
+    cancelled = False
+    try:
+        # Lagu dikirim sesuai urutan per media group begitu siap, bukan menunggu seluruh batch selesai
+        for index, query in enumerate(queries):
+            item = await tasks[index]
+            tasks[index] = None # Hasilnya cukup dipegang `group` agar buffer dilepas setelah dikirim
+            if not isinstance(item, dict):
+                failed.append(query)
+                continue
+            item["query"] = query
+            group.append(item)
+            buffered += media_size(item["media"]) if isinstance(item.get("media"), io.BytesIO) else 0
+            if len(group) == 10 or buffered >= SONG_BATCH_MAX_BUFFERED:
+                await flush()
+        if group:
+            await flush()
+    except (MediaJobCancelled, FlightAborted):
+        cancelled = True
+    finally:
+        # Saat batch berhenti di tengah: hentikan item yang masih berjalan dan bersihkan yang sudah siap
+        pending = [task for task in tasks if task is not None]
+        for task in pending:
+            task.cancel()
+        leftovers = [*group, *await asyncio.gather(*pending, return_exceptions=True)]
+        for item in leftovers:
+            if isinstance(item, dict) and item.get("job_dir"):
+                await run_sync(scratch_store.discard_job_dir, item["job_dir"])
+    if cancelled:
+        await safe_edit(status_message, "🚫 Download batch musik dibatalkan.", final=True)
+        return
+
+    summary = f"✅ {len(queries) - len(failed)}/{len(queries)} lagu terkirim."
+    if failed:
+        summary += "\n❌ Gagal: " + ", ".join(f"`{query}`" for query in failed[:10])
+    if truncated:
+        summary += f"\nℹ️ Hanya {len(queries)} lagu pertama yang diproses (batas per permintaan)."
+    await finish_status(message, status_message, summary)
+
+@bot.on_message(filters.command("song") & filters.private)
+@fair_scheduled("song")
+async def youtube_song_download(client, message):
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **URL YouTube** atau **query pencarian**.\nContoh: `/song Never Gonna Give You Up` atau `/song https://www.youtube.com/watch?v=dQw4w9WgXcQ`")
+        return
+    
+    query = message.text.split(maxsplit=1)[1].strip() # Teks asli, agar pemisah baris untuk batch tetap ada
+    user_id = message.from_user.id
+    try:
+        batch, truncated = await parse_song_batch(query, song_batch_limit(user_id))
+    except Exception as e:
+        logger.error(f"Gagal membaca playlist {query}: {e}")
+        await message.reply_text(f"❌ Gagal membaca playlist: `{e}`")
+        return
+    if batch:
+        if not is_owner_or_admin(user_id):
+            # Lagu tambahan dalam batch dikenai biaya token sendiri
+            rejected = fair_scheduler.admit(user_id, SONG_BATCH_ITEM_COST * (len(batch) - 1))
+            if rejected:
+                reason, wait = rejected
+                fair_scheduler.refund(user_id, COMMAND_COSTS.get("song", 1)) # Batch tidak dikerjakan: biaya /song dikembalikan
+                if reason == "rate_limited":
+                    await message.reply_text(f"🚫 Batch {len(batch)} lagu melebihi kuota Anda saat ini. Silakan coba lagi dalam {math.ceil(wait)} detik atau kirim lebih sedikit lagu.")
+                else:
+                    await message.reply_text(
+                        f"🚫 Bot sedang sibuk ({fair_scheduler.queued} permintaan dalam antrean).\n"
+                        f"Perkiraan waktu tunggu ~{math.ceil(wait)} detik. Silakan coba lagi nanti."
+                    )
+                logger.info(f"Batch song {len(batch)} lagu dari user {user_id} ditolak scheduler: {reason}")
+                return
+        status_message = await message.reply_text(f"⏳ Menyiapkan **{len(batch)}** lagu...")
+        logger.info(f"User {user_id} meminta batch song ({len(batch)} lagu): {query[:100]}")
+        await deliver_song_batch(message, status_message, batch, truncated)
+        return
+
+    query = " ".join(query.split())
+    status_message = await message.reply_text(f"⏳ Sedang mencari dan mengunduh musik untuk: `{query}`...")
+    logger.info(f"User {message.from_user.id} meminta song: {query}")
+    await deliver_youtube_media(message, status_message, query, is_video=False)
+
+@bot.on_message(filters.command("vsong") & filters.private)
+@fair_scheduled("vsong")
+async def youtube_video_download(client, message):
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **URL YouTube** atau **query pencarian**.\nContoh: `/vsong Rick Astley Never Gonna Give You Up` atau `/vsong https://www.youtube.com/watch?v=dQw4w9WgXcQ`")
+        return
+    
+    query = " ".join(message.command[1:])
+    status_message = await message.reply_text(f"⏳ Sedang mencari dan mengunduh video untuk: `{query}`...\nIni mungkin memakan waktu tergantung ukuran video.")
+    logger.info(f"User {message.from_user.id} meminta vsong: {query}")
+    await deliver_youtube_media(message, status_message, query, is_video=True)
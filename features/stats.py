@@ -0,0 +1,121 @@
+# features/stats.py
+# Metrik bot: endpoint Prometheus lokal, perintah /stats dan laporan stall event loop (/stalls) untuk owner.
+
+import logging
+import io
+import math
+import time
+from pyrogram import filters
+
+from config import METRICS_HOST, METRICS_PORT, METRICS_WORKER_PORT
+from core import bot, format_bytes, metrics, on_shutdown, on_startup, owner_only, stall_detector
+import core # Untuk membaca core.bot_role dan core.metrics_port yang ditetapkan main.py saat runtime
+
+logger = logging.getLogger(__name__)
+
+STATS_MAX_ROWS = 12 # Baris per bagian /stats agar pesan tidak melebihi batas panjang Telegram
+
+_metrics_runner = None
+
+async def handle_metrics(request):
+    from aiohttp import web
+
+    return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+@on_startup
+async def start_metrics_server():
+    """Menjalankan endpoint GET /metrics (format Prometheus) di METRICS_HOST dengan port sesuai role."""
+    global _metrics_runner
+    port = core.metrics_port
+    if port is None:
+        port = METRICS_WORKER_PORT if core.bot_role == "worker" else METRICS_PORT
+    if not port:
+        return
+    from aiohttp import web
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    _metrics_runner = web.AppRunner(app, access_log=None)
+    await _metrics_runner.setup()
+    await web.TCPSite(_metrics_runner, METRICS_HOST, port).start()
+    logger.info(f"Endpoint metrik Prometheus berjalan di http://{METRICS_HOST}:{port}/metrics")
+
+@on_shutdown
+async def stop_metrics_server():
+    if _metrics_runner:
+        await _metrics_runner.cleanup()
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    if math.isinf(seconds):
+        return f">{metrics.buckets[-1]:g}s"
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:g}s"
+
+def latency_rows(prefix):
+    """Ringkasan histogram `<prefix>_seconds` per label, diurutkan dari yang paling sering dipanggil."""
+    rows = []
+    for (name, labels), histogram in metrics.histograms.items():
+        if name != f"{prefix}_seconds":
+            continue
+        label = " ".join(str(value) for _, value in labels)
+        errors = metrics.errors_for(prefix, labels)
+        in_flight = metrics.gauges.get((f"{prefix}_in_flight", labels), 0)
+        rows.append((histogram["count"], (
+            f"  • `{label}`: {histogram['count']}× (error {errors}), "
+            f"p50 {format_duration(metrics.quantile(histogram, 0.5))}, p99 {format_duration(metrics.quantile(histogram, 0.99))}"
+            + (f", berjalan {in_flight}" if in_flight else "")
+        )))
+    rows.sort(key=lambda row: row[0], reverse=True)
+    lines = [line for _, line in rows[:STATS_MAX_ROWS]]
+    if len(rows) > STATS_MAX_ROWS:
+        lines.append(f"  • ... dan {len(rows) - STATS_MAX_ROWS} lainnya (lihat /metrics)")
+    return lines or ["  • Belum ada data."]
+
+@bot.on_message(filters.command("stats") & filters.private)
+@owner_only
+async def stats_command(client, message):
+    uptime = int(time.time() - metrics.started)
+    transferred = {}
+    for (name, labels), value in metrics.counters.items():
+        if name == "bot_backend_bytes_total":
+            labels = dict(labels)
+            transferred[f"{labels['backend']} {labels['direction']}"] = value
+    gauges = [
+        f"  • `{name}{metrics.format_labels(labels)}`: {value:g}"
+        for name, kind, labels, value in metrics.collect()
+        if kind == "gauge" and not name.endswith("_in_flight") and name != "bot_uptime_seconds"
+    ]
+
+    text = (
+        "**📊 Statistik Bot:**\n"
+        f"  • **Uptime:** {uptime // 3600} jam {uptime % 3600 // 60} menit\n\n"
+        "**Perintah:**\n" + "\n".join(latency_rows("bot_handler")) + "\n\n"
+        "**Backend:**\n" + "\n".join(latency_rows("bot_backend")) + "\n\n"
+        "**Antrean:**\n" + ("\n".join(gauges) or "  • Belum ada data.") + "\n\n"
+        "**Data ditransfer:**\n"
+        + ("\n".join(f"  • `{key}`: {format_bytes(value)}" for key, value in sorted(transferred.items())) or "  • Belum ada data.")
+    )
+    await message.reply_text(text)
+
+@bot.on_message(filters.command("stalls") & filters.private)
+@owner_only
+async def stalls_command(client, message):
+    if not stall_detector.enabled:
+        await message.reply_text(
+            "ℹ️ Detektor event loop tersendat tidak aktif.\n"
+            "Aktifkan dengan `LOOP_STALL_DETECTOR = True` di config.py atau jalankan `python main.py --debug-stalls`."
+        )
+        return
+    if len(message.command) > 1 and message.command[1].lower() == "reset":
+        stall_detector.reset()
+        await message.reply_text("✅ Laporan stall event loop dikosongkan.")
+        return
+
+    report = stall_detector.report()
+    if len(report) <= 4000:
+        await message.reply_text(f"```\n{report}\n```")
+        return
+    document = io.BytesIO(report.encode())
+    document.name = "loop_stalls.txt"
+    await message.reply_document(document, caption=f"🐢 Laporan stall event loop ({len(stall_detector.stalls)} lokasi).")
@@ -0,0 +1,231 @@
+# features/tiktok.py
+# Download video TikTok tanpa watermark (/tiktok_dl) lewat BotAcax.
+
+import logging
+import asyncio
+import re
+import aiohttp
+from urllib.parse import urlsplit
+from datetime import timedelta
+from pyrogram import filters
+from pyrogram.errors import BadRequest
+
+from config import (
+    BOTACAX_API_KEY, BOTACAX_TIKTOK_DOWNLOAD_ENDPOINT, TIKTOK_CACHE_ENABLED, TIKTOK_RESULT_TTL,
+    TIKTOK_FILE_ID_TTL, TIKTOK_SHORT_LINK_CACHE_MAX_ENTRIES, TIKTOK_SHORT_LINK_TTL
+)
+from core import (
+    BotAcaxError, FlightAborted, LazyCollection, SingleFlight, TTLCache, bot, botacax_client, fair_scheduled,
+    finish_status, get_http_session, register_index, utc_now
+)
+
+logger = logging.getLogger(__name__)
+
+tiktok_cache_collection = LazyCollection("tiktok_cache")
+register_index(tiktok_cache_collection, "last_used", expireAfterSeconds=TIKTOK_FILE_ID_TTL) # Entri video TikTok yang lama tidak diminta dihapus
+
+async def fetch_botacax_tiktok_download(tiktok_url):
+    """Mengambil informasi TikTok download dari BotAcax API."""
+    if not BOTACAX_TIKTOK_DOWNLOAD_ENDPOINT or not BOTACAX_API_KEY:
+        logger.warning("BOTACAX_TIKTOK_DOWNLOAD_ENDPOINT atau BOTACAX_API_KEY tidak diatur.")
+        return None
+    
+    payload = {"url": tiktok_url} # Asumsi BotAcax menerima URL di body atau param
+
+    try:
+        data = await botacax_client.post(BOTACAX_TIKTOK_DOWNLOAD_ENDPOINT, json=payload, timeout=30)
+        logger.debug("Data dari BotAcax TikTok API untuk %s: %s", tiktok_url, data)
+        return data
+    except (BotAcaxError, aiohttp.ClientError) as e:
+        logger.error(f"Error fetching from BotAcax TikTok API for URL {tiktok_url}: {e}")
+        return None
+    except ValueError as e:
+        logger.error(f"Error parsing JSON from BotAcax TikTok API for URL {tiktok_url}: {e}")
+        return None
+
+# --- Cache TikTok (ID video kanonik, short link, hasil BotAcax, file_id) ---
+
+TIKTOK_VIDEO_ID_PATTERNS = (
+    re.compile(r"tiktok\.com/(?:@[^/?#]*/)?(?:video|photo)/(\d{8,25})"),
+    re.compile(r"tiktok\.com/v/(\d{8,25})"),
+    re.compile(r"[?&](?:item_id|share_item_id)=(\d{8,25})"),
+)
+TIKTOK_SHORT_LINK_PATTERN = re.compile(r"^https?://(?:(?:vt|vm)\.tiktok\.com/|(?:www\.|m\.)?tiktok\.com/t/)[\w-]+", re.IGNORECASE)
+
+def extract_tiktok_video_id(url):
+    """Mengambil ID numerik video TikTok dari URL lengkap (abaikan parameter tracking)."""
+    for pattern in TIKTOK_VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+def strip_url_query(url):
+    """Membuang query string dan fragment (parameter tracking) dari URL."""
+    return url.split("#", 1)[0].split("?", 1)[0]
+
+tiktok_short_links = TTLCache(TIKTOK_SHORT_LINK_CACHE_MAX_ENTRIES, TIKTOK_SHORT_LINK_TTL)
+tiktok_short_link_flights = SingleFlight()
+
+async def resolve_tiktok_short_link(url):
+    """Mengikuti redirect short link (vt/vm.tiktok.com, tiktok.com/t/) ke URL video lengkap."""
+    session = await get_http_session()
+    async with session.get(url, allow_redirects=True, max_redirects=5, timeout=aiohttp.ClientTimeout(total=10)) as response:
+        return str(response.url)
+
+async def canonicalize_tiktok_url(url):
+    """Mengembalikan tuple (video_id, url_kanonik). video_id bernilai None jika tidak bisa ditentukan."""
+    url = url.strip()
+    if not re.match(r"^https?://", url, re.IGNORECASE):
+        url = f"https://{url}"
+    video_id = extract_tiktok_video_id(url)
+    if video_id:
+        return video_id, strip_url_query(url)
+
+    # Kode short link peka huruf besar/kecil: hanya scheme dan host yang dinormalkan
+    parts = urlsplit(strip_url_query(url).rstrip("/"))
+    short_key = f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}"
+    if not TIKTOK_SHORT_LINK_PATTERN.match(short_key):
+        return None, url
+
+    resolved = tiktok_short_links.get(short_key)
+    if resolved is None:
+        try:
+            resolved, _ = await tiktok_short_link_flights.run(short_key, lambda: resolve_tiktok_short_link(url))
+        except (aiohttp.ClientError, asyncio.TimeoutError, FlightAborted) as e:
+            logger.warning(f"Gagal mengikuti short link TikTok {url}: {e}")
+            return None, url
+        tiktok_short_links.set(short_key, resolved)
+    video_id = extract_tiktok_video_id(resolved)
+    return video_id, (strip_url_query(resolved) if video_id else url)
+
+class TikTokCache:
+    """Cache per ID video TikTok: URL tanpa watermark dari BotAcax (berlaku TIKTOK_RESULT_TTL) dan
+    file_id Telegram setelah video pertama kali dikirim (dihapus MongoDB jika tidak dipakai selama TIKTOK_FILE_ID_TTL)."""
+
+    def __init__(self, collection, result_ttl):
+        self.collection = collection
+        self.result_ttl = result_ttl
+        self.stats = {"file_id_hits": 0, "result_hits": 0, "misses": 0}
+
+    async def get(self, video_id):
+        try:
+            doc = await self.collection.find_one_and_update(
+                {"_id": video_id},
+                {"$set": {"last_used": utc_now()}}
+            )
+        except Exception as e:
+            logger.warning(f"Gagal membaca cache TikTok dari MongoDB: {e}")
+            return None
+        if doc and doc.get("video_url_cached_at") and utc_now() - doc["video_url_cached_at"] > timedelta(seconds=self.result_ttl):
+            doc["video_url"] = None # URL CDN TikTok punya masa berlaku; anggap kadaluarsa
+        return doc
+
+    async def _update(self, video_id, fields, unset=None):
+        update = {"$set": {**fields, "last_used": utc_now()}}
+        if unset:
+            update["$unset"] = {field: "" for field in unset}
+        try:
+            await self.collection.update_one({"_id": video_id}, update, upsert=True)
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan cache TikTok ke MongoDB: {e}")
+
+    async def store_result(self, video_id, video_url):
+        await self._update(video_id, {"video_url": video_url, "video_url_cached_at": utc_now()})
+
+    async def store_file_id(self, video_id, file_id):
+        await self._update(video_id, {"file_id": file_id})
+
+    async def invalidate_file_id(self, video_id):
+        await self._update(video_id, {}, unset=("file_id",))
+
+    async def invalidate_result(self, video_id):
+        await self._update(video_id, {}, unset=("video_url", "video_url_cached_at"))
+
+tiktok_cache = TikTokCache(tiktok_cache_collection, TIKTOK_RESULT_TTL)
+tiktok_result_flights = SingleFlight()
+
+async def get_tiktok_video_url(video_id, canonical_url, cached=None):
+    """URL video tanpa watermark: dari dokumen cache jika masih berlaku, selain itu dari BotAcax.
+
+    Mengembalikan tuple (video_url, pesan_error, dari_cache)."""
+    if cached and cached.get("video_url"):
+        tiktok_cache.stats["result_hits"] += 1
+        return cached["video_url"], None, True
+    tiktok_cache.stats["misses"] += 1
+
+    async def fetch():
+        botacax_data = await fetch_botacax_tiktok_download(canonical_url)
+        if botacax_data and isinstance(botacax_data, dict) and botacax_data.get('status') == 'success':
+            video_url = botacax_data.get('data', {}).get('video_url_no_watermark') # Asumsi BotAcax menyediakan ini
+            if not video_url:
+                return None, "Gagal mendapatkan URL video TikTok tanpa watermark dari BotAcax. Data tidak ditemukan atau format salah."
+            if video_id and TIKTOK_CACHE_ENABLED:
+                await tiktok_cache.store_result(video_id, video_url)
+            return video_url, None
+        error_message = botacax_data.get('message', 'Tidak ada data video yang ditemukan.') if botacax_data else 'Respons API tidak valid.'
+        logger.warning(f"Gagal download TikTok dari BotAcax: {error_message}")
+        return None, f"Gagal mengunduh video TikTok: {error_message}"
+
+    if not video_id:
+        video_url, error = await fetch()
+    else:
+        (video_url, error), _ = await tiktok_result_flights.run(video_id, fetch)
+    return video_url, error, False
+
+# --- Event Handlers ---
+
+@bot.on_message(filters.command("tiktok_dl") & filters.private)
+@fair_scheduled("tiktok_dl")
+async def tiktok_download(client, message):
+    if not BOTACAX_TIKTOK_DOWNLOAD_ENDPOINT or not BOTACAX_API_KEY:
+        await message.reply_text("❌ Fitur TikTok Downloader tidak diaktifkan atau konfigurasi API BotAcax tidak lengkap.")
+        return
+
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **URL video TikTok** yang ingin diunduh.\nContoh: `/tiktok_dl https://vt.tiktok.com/ZSJxy1234/`")
+        return
+    
+    tiktok_url = message.command[1].strip()
+    status_message = await message.reply_text(f"⏳ Sedang mengunduh video TikTok dari `{tiktok_url}`...\nIni mungkin memakan waktu.")
+    logger.info(f"User {message.from_user.id} meminta download TikTok: {tiktok_url}")
+
+    try:
+        video_id, canonical_url = await canonicalize_tiktok_url(tiktok_url)
+        cached = await tiktok_cache.get(video_id) if video_id and TIKTOK_CACHE_ENABLED else None
+
+        if cached and cached.get("file_id"):
+            try:
+                await message.reply_video(cached["file_id"], caption=f"✅ Video TikTok dari {tiktok_url}")
+                tiktok_cache.stats["file_id_hits"] += 1
+                logger.info(f"Video TikTok {video_id} dikirim ulang dari cache file_id.")
+                return
+            except BadRequest as e:
+                logger.warning(f"file_id cache TikTok {video_id} tidak berlaku lagi: {e}")
+                await tiktok_cache.invalidate_file_id(video_id)
+
+        video_url, error_message, from_cache = await get_tiktok_video_url(video_id, canonical_url, cached)
+        if not video_url:
+            await finish_status(message, status_message, f"❌ {error_message}")
+            return
+
+        try:
+            sent = await message.reply_video(video_url, caption=f"✅ Video TikTok dari {tiktok_url}")
+        except BadRequest as e:
+            if not from_cache:
+                raise
+            # URL CDN di cache sudah kadaluarsa lebih cepat dari TTL: minta URL baru ke BotAcax
+            logger.warning(f"URL video TikTok {video_id} di cache tidak bisa dipakai lagi: {e}")
+            await tiktok_cache.invalidate_result(video_id)
+            video_url, error_message, _ = await get_tiktok_video_url(video_id, canonical_url)
+            if not video_url:
+                await finish_status(message, status_message, f"❌ {error_message}")
+                return
+            sent = await message.reply_video(video_url, caption=f"✅ Video TikTok dari {tiktok_url}")
+
+        logger.info(f"Video TikTok berhasil dikirim untuk {tiktok_url}")
+        if video_id and TIKTOK_CACHE_ENABLED and sent and sent.video:
+            await tiktok_cache.store_file_id(video_id, sent.video.file_id)
+    except Exception as e:
+        logger.error(f"Error saat proses TikTok download untuk {tiktok_url}: {e}")
+        await finish_status(message, status_message, f"Terjadi kesalahan saat mengunduh video TikTok: `{e}`")
@@ -0,0 +1,218 @@
+# features/users.py
+# Pencatatan pengguna, /start dan /getuser.
+
+import logging
+import asyncio
+import aiohttp
+from datetime import datetime
+from pyrogram import filters
+
+from config import (
+    USER_ACTIVITY_FLUSH_INTERVAL, USER_ACTIVITY_MAX_PENDING, BOTACAX_API_KEY, BOTACAX_USERINFO_ENDPOINT
+)
+from core import (
+    ADMIN_IDS, BotAcaxError, LazyCollection, OWNER_IDS, bot, botacax_client, finish_status, metrics,
+    on_shutdown, on_startup, owner_or_admin_only, start_background
+)
+
+logger = logging.getLogger(__name__)
+
+users_collection = LazyCollection("users")
+
+class UserStore:
+    """Pencatatan pengguna dengan write-behind: pendaftaran dan update last_interaction ditampung di memori
+    lalu ditulis ke MongoDB sebagai satu bulk_write (upsert per pengguna) setiap USER_ACTIVITY_FLUSH_INTERVAL detik."""
+
+    def __init__(self, collection, flush_interval, max_pending):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {} # user_id -> waktu interaksi terakhir
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+
+    def touch(self, user_id):
+        """Mencatat interaksi pengguna tanpa menunggu MongoDB."""
+        self._pending[user_id] = datetime.now()
+        if len(self._pending) >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Menulis semua interaksi yang tertunda dalam satu bulk_write."""
+        from pymongo import UpdateOne
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            operations = [
+                UpdateOne(
+                    {"_id": user_id},
+                    {
+                        "$setOnInsert": {"is_owner": user_id in OWNER_IDS, "is_admin": user_id in ADMIN_IDS},
+                        "$max": {"last_interaction": last_interaction},
+                    },
+                    upsert=True
+                )
+                for user_id, last_interaction in pending.items()
+            ]
+            try:
+                result = await self.collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.warning(f"Gagal menulis {len(operations)} aktivitas pengguna ke MongoDB, dicoba lagi nanti: {e}")
+                for user_id, last_interaction in pending.items():
+                    # Gabungkan kembali tanpa menimpa interaksi yang lebih baru
+                    if self._pending.get(user_id, last_interaction) <= last_interaction:
+                        self._pending[user_id] = last_interaction
+                return
+            for user_id in result.upserted_ids.values():
+                logger.info(f"Pengguna baru terdaftar: {user_id}")
+
+    async def run_flusher(self):
+        """Loop latar belakang yang mem-flush buffer secara berkala."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+user_store = UserStore(users_collection, USER_ACTIVITY_FLUSH_INTERVAL, USER_ACTIVITY_MAX_PENDING)
+
+@metrics.register_collector
+def _user_store_metrics():
+    return [("bot_user_activity_pending", "gauge", {}, len(user_store._pending))]
+
+@on_startup
+async def start_user_activity_flusher():
+    start_background(user_store.run_flusher())
+
+@on_shutdown
+async def flush_user_activity():
+    await user_store.flush() # Tulis sisa aktivitas pengguna sebelum keluar
+
+# --- Client BotAcax ---
+
+async def fetch_botacax_userinfo(telegram_id):
+    """Mengambil informasi pengguna dari BotAcax API."""
+    if not BOTACAX_USERINFO_ENDPOINT or not BOTACAX_API_KEY:
+        logger.warning("BOTACAX_USERINFO_ENDPOINT atau BOTACAX_API_KEY tidak diatur.")
+        return None
+
+    params = {"telegram_id": telegram_id}
+
+    try:
+        data = await botacax_client.get(BOTACAX_USERINFO_ENDPOINT, params=params, timeout=10)
+        logger.debug("Data dari BotAcax UserInfo API untuk %s: %s", telegram_id, data)
+        return data
+    except (BotAcaxError, aiohttp.ClientError) as e:
+        logger.error(f"Error fetching from BotAcax UserInfo API for ID {telegram_id}: {e}")
+        return None
+    except ValueError as e:
+        logger.error(f"Error parsing JSON from BotAcax UserInfo API for ID {telegram_id}: {e}")
+        return None
+
+# --- Event Handlers ---
+
+@bot.on_message(filters.command("start") & filters.private)
+async def start_command(client, message):
+    user_id = message.from_user.id
+    user_name = message.from_user.first_name
+
+    user_store.touch(user_id) # Daftar/perbarui last_interaction secara batch di latar belakang
+
+    await message.reply_text(
+        f"👋 Halo **{user_name}**!\n"
+        "Selamat datang di **Telegram Checker Bot**.\n\n"
+        "Gunakan perintah berikut untuk fitur pengecekan:\n"
+        "  • `/check_number <nomor_telepon>` - Mengecek apakah nomor terdaftar di Telegram.\n"
+        "  • `/check_otp <kode_otp>` - Mengecek kode OTP untuk nomor terakhir yang dicek.\n"
+        "  • `/check_a2f <password_a2f>` - Mengecek Two-Factor Authentication (A2F).\n\n"
+        "Gunakan perintah berikut untuk fitur AI:\n"
+        "  • `/ask <pertanyaan>` - Bertanya ke AI tercepat yang tersedia (OpenAI/Gemini).\n"
+        "  • `/ask_openai <pertanyaan>` - Bertanya kepada OpenAI (ChatGPT).\n"
+        "  • `/ask_gemini <pertanyaan>` - Bertanya kepada Google Gemini.\n\n"
+        "Gunakan perintah berikut untuk Multimedia:\n"
+        "  • `/tiktok_dl <url_tiktok>` - Mengunduh video TikTok (tanpa watermark).\n"
+        "  • `/song <url_youtube_atau_query>` - Mengunduh dan mengirim audio dari YouTube.\n"
+        "    Bisa juga URL playlist atau beberapa judul dipisah `;` (dikirim sebagai album).\n"
+        "  • `/vsong <url_youtube_atau_query>` - Mengunduh dan mengirim video dari YouTube.\n"
+        "  • `/cancel [id_job]` - Membatalkan download musik/video yang sedang antre atau berjalan.\n\n"
+        "Fitur khusus Owner/Admin:\n"
+        "  • `/getuser <user_id>` - Mendapatkan informasi detail pengguna bot, termasuk dari BotAcax.\n"
+        "  • `/ai_cache` - Melihat statistik cache jawaban AI.\n"
+        "  • `/ai_cache_clear [openai|gemini|all] [prompt]` - Menghapus cache jawaban AI."
+    )
+
+@bot.on_message(filters.command("getuser") & filters.private)
+@owner_or_admin_only
+async def get_user_info(client, message):
+    if len(message.command) < 2:
+        await message.reply_text("Silakan berikan **ID pengguna** yang ingin Anda cari.\nContoh: `/getuser 123456789`")
+        return
+
+    try:
+        target_user_id = int(message.command[1].strip())
+    except ValueError:
+        await message.reply_text("ID pengguna harus berupa angka yang valid.")
+        return
+
+    logger.info(f"Owner/Admin {message.from_user.id} meminta info user: {target_user_id}")
+    status_message = None
+    
+    user_info_str = f"**🔍 Informasi Pengguna (ID: `{target_user_id}`):**\n"
+
+    # --- Informasi dari Database Bot ---
+    try:
+        target_user_db = await users_collection.find_one({"_id": target_user_id})
+    except Exception as e:
+        logger.warning(f"Gagal membaca data user {target_user_id} dari MongoDB: {e}")
+        user_info_str += "  • Status di Bot DB: Tidak dapat dibaca (database sedang tidak tersedia, coba lagi nanti)\n"
+    else:
+        if target_user_db:
+            is_owner_status = "✅ Ya" if target_user_db.get("is_owner") else "❌ Tidak"
+            is_admin_status = "✅ Ya" if target_user_db.get("is_admin") else "❌ Tidak"
+
+            user_info_str += (
+                f"  • **Owner di Bot:** {is_owner_status}\n"
+                f"  • **Admin di Bot:** {is_admin_status}\n"
+                f"  • **Terakhir Interaksi:** {target_user_db.get('last_interaction').strftime('%Y-%m-%d %H:%M:%S') if target_user_db.get('last_interaction') else 'Tidak diketahui'}\n"
+            )
+        else:
+            user_info_str += "  • Status di Bot DB: Tidak terdaftar (Mungkin belum pernah `/start`)\n"
+
+    # --- Informasi dari Telegram API (Pyrogram) ---
+    try:
+        pyrogram_user = await client.get_users(target_user_id)
+        user_info_str += (
+            f"  • **Nama Lengkap:** {pyrogram_user.first_name} {pyrogram_user.last_name or ''}\n"
+            f"  • **Username:** @{pyrogram_user.username or 'Tidak ada'}\n"
+            f"  • **Adalah Bot:** {'✅ Ya' if pyrogram_user.is_bot else '❌ Tidak'}\n"
+        )
+    except Exception as e:
+        logger.warning(f"Gagal mengambil detail Pyrogram user {target_user_id}: {e}")
+        user_info_str += "  • Detail Telegram: Tidak dapat diambil (ID mungkin tidak valid atau masalah API).\n"
+    
+    # --- Informasi dari BotAcax API ---
+    if BOTACAX_USERINFO_ENDPOINT and BOTACAX_API_KEY:
+        status_message = await message.reply_text("⏳ Sedang mengambil informasi dari BotAcax API...")
+        botacax_data = await fetch_botacax_userinfo(target_user_id)
+        if botacax_data:
+            user_info_str += "\n**🌐 Informasi dari BotAcax API:**\n"
+            if isinstance(botacax_data, dict) and botacax_data.get('status') == 'success': # Asumsi respons sukses punya 'status': 'success'
+                data_payload = botacax_data.get('data')
+                if data_payload and isinstance(data_payload, dict):
+                    user_info_str += f"  • **Nama Akun:** {data_payload.get('full_name', 'N/A')}\n"
+                    user_info_str += f"  • **Username Telegram:** @{data_payload.get('telegram_username', 'N/A')}\n"
+                    user_info_str += f"  • **Bio Telegram:** {data_payload.get('telegram_bio', 'N/A')}\n"
+                    user_info_str += f"  • **ID GitHub:** {data_payload.get('github_id', 'Tidak ditemukan')}\n"
+                    user_info_str += f"  • **Username GitHub:** {data_payload.get('github_username', 'Tidak ditemukan')}\n"
+                    user_info_str += f"  • **Email GitHub:** {data_payload.get('github_email', 'Tidak ditemukan')}\n"
+                    # Tambahkan data lain sesuai respons BotAcax API Anda
+                else:
+                    user_info_str += "  • Data akun tidak ditemukan di BotAcax.\n"
+            else:
+                user_info_str += f"  • Respons BotAcax API: {botacax_data.get('message', str(botacax_data))}\n"
+        else:
+            user_info_str += "\n🌐 **Informasi dari BotAcax API:** Gagal mengambil atau tidak ditemukan.\n"
+    else:
+        user_info_str += "\n🌐 **Informasi BotAcax API:** Konfigurasi API tidak lengkap.\n"
+
+    await finish_status(message, status_message, user_info_str) # Hasil menggantikan pesan status, bukan pesan baru